@@ -1,22 +1,132 @@
 import random
 import chess
 import chess.engine
+import chess.polyglot
+import chess.pgn
+import chess.syzygy
 import sys
 import time
 import argparse
 import os
+import concurrent.futures
+import asyncio
+import shutil
+import mmap
+import struct
+import multiprocessing
+import multiprocessing.util
+import threading
+import json
+import math
+import shlex
+import itertools
+import collections
+import collections.abc
+import cProfile
+import pstats
+
+# NumPy is only needed for the batched Board12D functions
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Every axis of the 12D board is bounded: the first two form the familiar 8x8 board and the
+# other ten are short extra dimensions. Positions are encoded as mixed-radix integers over
+# this shape (axis 0 most significant), so the board can be stored compactly by index.
+BOARD_DIMENSIONS = 12
+BOARD_SHAPE = (8, 8) + (2,) * 10
+BOARD_STRIDES = tuple(math.prod(BOARD_SHAPE[i + 1:]) for i in range(BOARD_DIMENSIONS))
+BOARD_CELLS = math.prod(BOARD_SHAPE)
+BOARD_POSITIONS = list(itertools.product(*(range(size) for size in BOARD_SHAPE)))
+POSITION_INDEX = {position: index for index, position in enumerate(BOARD_POSITIONS)}
+
+# Pawns advance along axis 0 and promote on its last cell
+PROMOTION_RANK = {'White': BOARD_SHAPE[0] - 1, 'Black': 0}
+
+# The back rank runs along axis 1, so the king and rooks castle along it
+CASTLING_AXIS = 1
+CASTLING_END = BOARD_SHAPE[CASTLING_AXIS] - 1
+
+def encode_position(position):
+    index = POSITION_INDEX.get(tuple(position))
+    if index is None:
+        raise ValueError("Position is off the board")
+    return index
+
+def decode_position(index):
+    return BOARD_POSITIONS[index]
+
+def is_on_board(position):
+    return len(position) == BOARD_DIMENSIONS and all(0 <= x < size for x, size in zip(position, BOARD_SHAPE))
+
+def iter_bits(bits):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+# Dict-style view of a Board12D keyed by coordinate tuples, so board.board keeps working
+# as the position -> piece mapping it used to be
+class BoardView(collections.abc.MutableMapping):
+    def __init__(self, board):
+        self.owner = board
+
+    def __getitem__(self, position):
+        index = POSITION_INDEX.get(position)
+        if index is None or index not in self.owner.squares:
+            raise KeyError(position)
+        return self.owner.squares[index]
+
+    def __setitem__(self, position, piece):
+        self.owner.put(encode_position(position), piece)
+
+    def __delitem__(self, position):
+        index = POSITION_INDEX.get(position)
+        if index is None or index not in self.owner.squares:
+            raise KeyError(position)
+        self.owner.remove(index)
+
+    def __iter__(self):
+        return iter([BOARD_POSITIONS[index] for index in self.owner.squares])
+
+    def __len__(self):
+        return len(self.owner.squares)
+
+    def __contains__(self, position):
+        index = POSITION_INDEX.get(position)
+        return index is not None and index in self.owner.squares
 
 # Define the 12D Chess Board and Piece Classes
 class Board12D:
     def __init__(self):
-        self.board = {}
+        self.squares = {}
+        self.occupancy = {'White': 0, 'Black': 0}
+        self.kings = {'White': None, 'Black': None}
+        self.board = BoardView(self)
         self.king_moved = {'White': False, 'Black': False}
         self.rook_moved = {'White': [False, False], 'Black': [False, False]}
         self.turn = 'White'
         self.game_over = False
+        self.move_stack = []
 
     def place_piece(self, piece, position):
-        self.board[position] = piece
+        self.put(encode_position(position), piece)
+
+    def put(self, index, piece):
+        if index in self.squares:
+            self.remove(index)
+        self.squares[index] = piece
+        self.occupancy[piece.color] |= 1 << index
+        if isinstance(piece, King):
+            self.kings[piece.color] = index
+
+    def remove(self, index):
+        piece = self.squares.pop(index)
+        self.occupancy[piece.color] &= ~(1 << index)
+        if isinstance(piece, King) and self.kings[piece.color] == index:
+            self.kings[piece.color] = None
+        return piece
 
     def move_piece(self, from_position, to_position):
         if self.game_over:
@@ -29,47 +139,163 @@ class Board12D:
         if to_position not in piece.valid_moves(from_position, self):
             raise ValueError("Invalid move")
 
-        self.board[to_position] = self.board.pop(from_position)
-        if isinstance(piece, Pawn):
-            piece.promote(to_position, self, Queen(piece.color))
+        self.push(from_position, to_position)
+        self.check_for_checkmate()
 
+    # Castling rights packed into six bits: king_moved White/Black, then rook_moved
+    # White queenside/kingside and Black queenside/kingside
+    def castling_bits(self):
+        return (self.king_moved['White'] | self.king_moved['Black'] << 1
+                | self.rook_moved['White'][0] << 2 | self.rook_moved['White'][1] << 3
+                | self.rook_moved['Black'][0] << 4 | self.rook_moved['Black'][1] << 5)
+
+    def set_castling_bits(self, bits):
+        self.king_moved['White'] = bool(bits & 1)
+        self.king_moved['Black'] = bool(bits & 2)
+        self.rook_moved['White'] = [bool(bits & 4), bool(bits & 8)]
+        self.rook_moved['Black'] = [bool(bits & 16), bool(bits & 32)]
+
+    def update_castling_rights(self, piece, index):
+        if isinstance(piece, King):
+            self.king_moved[piece.color] = True
+        elif isinstance(piece, Rook) and self.kings[piece.color] is not None:
+            # Only a rook leaving or lost on a castling square, an end of its own king's back
+            # rank (see find_castling_pieces), costs that right
+            king_position = BOARD_POSITIONS[self.kings[piece.color]]
+            position = BOARD_POSITIONS[index]
+            if position == self.along_back_rank(king_position, 0):
+                self.rook_moved[piece.color][0] = True
+            elif position == self.along_back_rank(king_position, CASTLING_END):
+                self.rook_moved[piece.color][1] = True
+
+    # Makes a move without validating it, recording everything pop() needs to undo it:
+    # (from, to, moved piece, captured piece, rook from, rook to, castling bits, turn, game_over)
+    def push(self, from_position, to_position):
+        self.push_index(POSITION_INDEX[from_position], POSITION_INDEX[to_position])
+
+    def push_index(self, from_index, to_index):
+        piece = self.remove(from_index)
+        captured = self.squares.get(to_index)
+        self.move_stack.append((from_index, to_index, piece, captured, None, None, self.castling_bits(), self.turn, self.game_over))
+        self.update_castling_rights(piece, from_index)
+        if captured is not None:
+            self.update_castling_rights(captured, to_index)
+        if isinstance(piece, Pawn) and BOARD_POSITIONS[to_index][0] == PROMOTION_RANK[piece.color]:
+            piece = Queen(piece.color)
+        self.put(to_index, piece)
         self.turn = 'Black' if self.turn == 'White' else 'White'
-        self.check_for_checkmate()
+
+    def push_castle(self, color, rook_side):
+        king_position, rook_position = self.find_castling_pieces(color, rook_side)
+        new_king_position, new_rook_position = self.castling_targets(king_position, rook_position, rook_side)
+        king_from, king_to = POSITION_INDEX[king_position], POSITION_INDEX[new_king_position]
+        rook_from, rook_to = POSITION_INDEX[rook_position], POSITION_INDEX[new_rook_position]
+
+        self.move_stack.append((king_from, king_to, self.squares[king_from], None, rook_from, rook_to, self.castling_bits(), self.turn, self.game_over))
+        self.put(king_to, self.remove(king_from))
+        self.put(rook_to, self.remove(rook_from))
+        self.king_moved[color] = True
+        self.rook_moved[color][1 if rook_side == 'kingside' else 0] = True
+        self.turn = 'Black' if color == 'White' else 'White'
+
+    # Moves are (from_index, to_index) pairs; castling is (king_from, king_to, rook_side)
+    def pseudo_legal_moves(self, color=None):
+        color = color or self.turn
+        moves = []
+        for index, piece in self.squares.items():
+            if piece.color == color:
+                for target in piece.target_indices(index, self):
+                    moves.append((index, target))
+        return moves
+
+    def legal_moves(self, color=None):
+        color = color or self.turn
+        moves = []
+        for move in self.pseudo_legal_moves(color):
+            self.push_index(*move)
+            if not self.is_in_check(color):
+                moves.append(move)
+            self.pop()
+        for rook_side in ('kingside', 'queenside'):
+            if self.can_castle(color, rook_side):
+                king_position, rook_position = self.find_castling_pieces(color, rook_side)
+                king_to, _ = self.castling_targets(king_position, rook_position, rook_side)
+                moves.append((POSITION_INDEX[king_position], POSITION_INDEX[king_to], rook_side))
+        return moves
+
+    def push_move(self, move):
+        if len(move) == 3:
+            self.push_castle(self.squares[move[0]].color, move[2])
+        else:
+            self.push_index(move[0], move[1])
+
+    def describe_move(self, move):
+        if len(move) == 3:
+            return f"castles {move[2]}"
+        return f"{BOARD_POSITIONS[move[0]]} -> {BOARD_POSITIONS[move[1]]}"
+
+    def pop(self):
+        from_index, to_index, piece, captured, rook_from, rook_to, bits, turn, game_over = self.move_stack.pop()
+        if rook_from is not None:
+            self.put(rook_from, self.remove(rook_to))
+        self.remove(to_index)
+        self.put(from_index, piece)
+        if captured is not None:
+            self.put(to_index, captured)
+        self.set_castling_bits(bits)
+        self.turn = turn
+        self.game_over = game_over
+        return BOARD_POSITIONS[from_index], BOARD_POSITIONS[to_index]
 
     def get_piece(self, position):
-        return self.board.get(position, None)
+        index = POSITION_INDEX.get(position)
+        return None if index is None else self.squares.get(index)
+
+    def find_king(self, color):
+        return self.kings[color]
+
+    # Reverse attack lookup: walk outwards from the square along every ray and jump set and
+    # look for an enemy piece that moves that way, instead of generating every enemy move
+    def is_square_attacked(self, index, by_color):
+        squares = self.squares
+        for rays, attackers in ((ROOK_RAYS[index], (Rook, Queen)), (BISHOP_RAYS[index], (Bishop, Queen))):
+            for ray in rays:
+                for target in ray:
+                    piece = squares.get(target)
+                    if piece is not None:
+                        if piece.color == by_color and isinstance(piece, attackers):
+                            return True
+                        break
+        for jumps, attacker in ((KNIGHT_JUMPS[index], Knight), (KING_STEPS[index], King)):
+            for target in jumps:
+                piece = squares.get(target)
+                if piece is not None and piece.color == by_color and isinstance(piece, attacker):
+                    return True
+        # A pawn attacks this square from where a defending pawn here would capture
+        defender = 'Black' if by_color == 'White' else 'White'
+        for target in PAWN_CAPTURES[defender][index]:
+            piece = squares.get(target)
+            if piece is not None and piece.color == by_color and isinstance(piece, Pawn):
+                return True
+        return False
 
     def is_in_check(self, color):
-        king_position = None
-        for pos, piece in self.board.items():
-            if isinstance(piece, King) and piece.color == color:
-                king_position = pos
-                break
-        if not king_position:
+        king_index = self.kings[color]
+        if king_index is None:
             return False
-        for pos, piece in self.board.items():
-            if piece.color != color:
-                if king_position in piece.valid_moves(pos, self):
-                    return True
-        return False
+        return self.is_square_attacked(king_index, 'Black' if color == 'White' else 'White')
 
     def is_checkmate(self, color):
         if not self.is_in_check(color):
             return False
-        for pos, piece in self.board.items():
+        for index, piece in list(self.squares.items()):
             if piece.color == color:
-                for move in piece.valid_moves(pos, self):
-                    original_position = pos
-                    original_piece = self.get_piece(move)
-                    self.board[move] = self.board.pop(pos)
-                    if not self.is_in_check(color):
-                        self.board[original_position] = self.board.pop(move)
-                        if original_piece:
-                            self.board[move] = original_piece
+                for target in piece.target_indices(index, self):
+                    self.push_index(index, target)
+                    escaped = not self.is_in_check(color)
+                    self.pop()
+                    if escaped:
                         return False
-                    self.board[original_position] = self.board.pop(move)
-                    if original_piece:
-                        self.board[move] = original_piece
         return True
 
     def check_for_checkmate(self):
@@ -80,20 +306,33 @@ class Board12D:
             print("Checkmate! White wins!")
             self.game_over = True
 
+    # The rook has to stand at the end of the king's own back rank
+    def find_castling_pieces(self, color, rook_side):
+        king_index = self.kings[color]
+        if king_index is None:
+            return None, None
+        king_position = BOARD_POSITIONS[king_index]
+        rook_position = self.along_back_rank(king_position, CASTLING_END if rook_side == 'kingside' else 0)
+        rook = self.get_piece(rook_position)
+        if not (isinstance(rook, Rook) and rook.color == color):
+            rook_position = None
+        return king_position, rook_position
+
+    @staticmethod
+    def along_back_rank(position, y):
+        return (*position[:CASTLING_AXIS], y, *position[CASTLING_AXIS + 1:])
+
+    @staticmethod
+    def castling_targets(king_position, rook_position, rook_side):
+        if rook_side == 'kingside':
+            return Board12D.along_back_rank(king_position, 6), Board12D.along_back_rank(rook_position, 5)
+        return Board12D.along_back_rank(king_position, 2), Board12D.along_back_rank(rook_position, 3)
+
     def can_castle(self, color, rook_side):
         if self.game_over:
             return False
 
-        king_position = None
-        rook_position = None
-        for pos, piece in self.board.items():
-            if isinstance(piece, King) and piece.color == color:
-                king_position = pos
-            elif isinstance(piece, Rook) and piece.color == color:
-                if rook_side == 'kingside' and pos[0] == 7:
-                    rook_position = pos
-                elif rook_side == 'queenside' and pos[0] == 0:
-                    rook_position = pos
+        king_position, rook_position = self.find_castling_pieces(color, rook_side)
 
         if not king_position or not rook_position:
             return False
@@ -109,404 +348,2766 @@ class Board12D:
         if self.is_in_check(color):
             return False
 
+        king_y = king_position[CASTLING_AXIS]
         if rook_side == 'kingside':
-            positions_between = [(i, king_position[1], *king_position[2:]) for i in range(king_position[0] + 1, 7)]
+            between = range(king_y + 1, CASTLING_END)
         else:
-            positions_between = [(i, king_position[1], *king_position[2:]) for i in range(1, king_position[0])]
+            between = range(1, king_y)
+        positions_between = [self.along_back_rank(king_position, y) for y in between]
 
         for pos in positions_between:
             if self.get_piece(pos) or self.is_in_check_at_position(color, pos):
                 return False
 
+        # The king and rook may only land on empty squares (or each other's old squares)
+        for pos in self.castling_targets(king_position, rook_position, rook_side):
+            if self.get_piece(pos) and pos not in (king_position, rook_position):
+                return False
+
         return True
 
     def castle(self, color, rook_side):
         if not self.can_castle(color, rook_side):
             raise ValueError("Castling conditions not met")
 
-        king_position = None
-        rook_position = None
-        for pos, piece in self.board.items():
-            if isinstance(piece, King) and piece.color == color:
-                king_position = pos
-            elif isinstance(piece, Rook) and piece.color == color:
-                if rook_side == 'kingside' and pos[0] == 7:
-                    rook_position = pos
-                elif rook_side == 'queenside' and pos[0] == 0:
-                    rook_position = pos
-
-        if rook_side == 'kingside':
-            new_king_position = (6, king_position[1], *king_position[2:])
-            new_rook_position = (5, rook_position[1], *rook_position[2:])
-        else:
-            new_king_position = (2, king_position[1], *king_position[2:])
-            new_rook_position = (3, rook_position[1], *rook_position[2:])
-
-        self.board[new_king_position] = self.board.pop(king_position)
-        self.board[new_rook_position] = self.board.pop(rook_position)
+        self.push_castle(color, rook_side)
 
     def is_in_check_at_position(self, color, position):
-        for pos, piece in self.board.items():
-            if piece.color != color:
-                if position in piece.valid_moves(pos, self):
-                    return True
-        return False
+        return self.is_square_attacked(encode_position(position), 'Black' if color == 'White' else 'White')
 
     def print_board(self):
         board_2d = [['.' for _ in range(8)] for _ in range(8)]
-        for pos, piece in self.board.items():
-            x, y = pos[0], pos[1]
+        for index, piece in self.squares.items():
+            x, y = BOARD_POSITIONS[index][:2]
             board_2d[y][x] = piece.symbol()
         print("  a b c d e f g h")
         for i, row in enumerate(board_2d):
             print(f"{8 - i} {' '.join(row)} {8 - i}")
         print("  a b c d e f g h\n")
 
-# Define piece classes with the previous logic
-class King:
-    def __init__(self, color):
-        self.color = color
+# Move geometry shared by all pieces. A direction is a tuple of (axis, step) pairs applied
+# together; rooks step along one axis, bishops along two axes at once by the same distance.
+ROOK_DIRECTIONS = [((i, sign),) for i in range(BOARD_DIMENSIONS) for sign in (-1, 1)]
+BISHOP_DIRECTIONS = [((i, sign1), (j, sign2)) for i in range(BOARD_DIMENSIONS) for j in range(i + 1, BOARD_DIMENSIONS)
+                     for sign1 in (-1, 1) for sign2 in (-1, 1)]
+KING_OFFSETS = ROOK_DIRECTIONS
+KNIGHT_OFFSETS = [((i, a), (j, b)) for i in range(BOARD_DIMENSIONS) for j in range(i + 1, BOARD_DIMENSIONS)
+                  for a, b in ((2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2))]
+
+def offset_target(position, offset):
+    target = list(position)
+    for axis, step in offset:
+        target[axis] += step
+    return POSITION_INDEX.get(tuple(target))
+
+def build_rays(index, directions):
+    position = BOARD_POSITIONS[index]
+    rays = []
+    for direction in directions:
+        ray = []
+        distance = 1
+        while True:
+            target = offset_target(position, [(axis, step * distance) for axis, step in direction])
+            if target is None:
+                break
+            ray.append(target)
+            distance += 1
+        if ray:
+            rays.append(tuple(ray))
+    return tuple(rays)
+
+def build_jumps(index, offsets):
+    position = BOARD_POSITIONS[index]
+    targets = (offset_target(position, offset) for offset in offsets)
+    return tuple(target for target in targets if target is not None)
+
+def build_pawn_pushes(index, color):
+    position = BOARD_POSITIONS[index]
+    direction = 1 if color == 'White' else -1
+    one = offset_target(position, [(0, direction)])
+    if one is None:
+        return ()
+    if (color == 'White' and position[0] == 1) or (color == 'Black' and position[0] == 6):
+        return (one, offset_target(position, [(0, 2 * direction)]))
+    return (one,)
+
+def build_pawn_captures(index, color):
+    direction = 1 if color == 'White' else -1
+    return build_jumps(index, [((0, direction), (i, sign)) for i in range(1, BOARD_DIMENSIONS) for sign in (1, -1)])
+
+# Per-square move tables over encoded positions. A table entry is built the first time a
+# piece stands on that square and shared by every board and piece afterwards; building all
+# 65536 squares up front would cost far more than the handful a game actually visits.
+class MoveTable:
+    def __init__(self, builder):
+        self.builder = builder
+        self.entries = [None] * BOARD_CELLS
+
+    def __getitem__(self, index):
+        entry = self.entries[index]
+        if entry is None:
+            entry = self.entries[index] = self.builder(index)
+        return entry
+
+ROOK_RAYS = MoveTable(lambda index: build_rays(index, ROOK_DIRECTIONS))
+BISHOP_RAYS = MoveTable(lambda index: build_rays(index, BISHOP_DIRECTIONS))
+KING_STEPS = MoveTable(lambda index: build_jumps(index, KING_OFFSETS))
+KNIGHT_JUMPS = MoveTable(lambda index: build_jumps(index, KNIGHT_OFFSETS))
+PAWN_PUSHES = {color: MoveTable(lambda index, color=color: build_pawn_pushes(index, color)) for color in ('White', 'Black')}
+PAWN_CAPTURES = {color: MoveTable(lambda index, color=color: build_pawn_captures(index, color)) for color in ('White', 'Black')}
+
+def slide_targets(rays, squares, color):
+    targets = []
+    for ray in rays:
+        for target in ray:
+            piece = squares.get(target)
+            if piece is None:
+                targets.append(target)
+            else:
+                # A ray ends at the first blocker, which can be captured if it is an enemy
+                if piece.color != color:
+                    targets.append(target)
+                break
+    return targets
+
+def jump_targets(jumps, squares, color):
+    targets = []
+    for target in jumps:
+        piece = squares.get(target)
+        if piece is None or piece.color != color:
+            targets.append(target)
+    return targets
+
+# Define piece classes. Pieces hold no state besides their color, so there is exactly one
+# instance per class and color (King('White') always returns the same object).
+class Piece:
+    letter = '?'
+    instances = {}
+
+    def __new__(cls, color):
+        piece = Piece.instances.get((cls, color))
+        if piece is None:
+            piece = super().__new__(cls)
+            piece.color = color
+            Piece.instances[(cls, color)] = piece
+        return piece
+
+    def __getnewargs__(self):
+        return (self.color,)
 
     def valid_moves(self, position, board):
-        valid_moves = []
-        for i in range(12):
-            for sign in [-1, 1]:
-                new_position = list(position)
-                new_position[i] += sign
-                new_position = tuple(new_position)
-                if self.is_valid_position(new_position) and not board.get_piece(new_position):
-                    valid_moves.append(new_position)
-        return valid_moves
+        return [BOARD_POSITIONS[target] for target in self.target_indices(POSITION_INDEX[position], board)]
 
     @staticmethod
     def is_valid_position(position):
-        return all(0 <= x < 8 for x in position[:2])
+        return is_on_board(position)
 
     def symbol(self):
-        return 'K' if self.color == 'White' else 'k'
+        return self.letter if self.color == 'White' else self.letter.lower()
 
-class Rook:
-    def __init__(self, color):
-        self.color = color
+class King(Piece):
+    letter = 'K'
 
-    def valid_moves(self, position, board):
-        valid_moves = []
-        for i in range(12):
-            for delta in range(1, 8):
-                for sign in [-1, 1]:
-                    new_position = list(position)
-                    new_position[i] += sign * delta
-                    new_position = tuple(new_position)
-                    if self.is_valid_position(new_position) and not board.get_piece(new_position):
-                        valid_moves.append(new_position)
-                    else:
-                        break
-        return valid_moves
+    def target_indices(self, index, board):
+        return jump_targets(KING_STEPS[index], board.squares, self.color)
 
-    @staticmethod
-    def is_valid_position(position):
-        return all(0 <= x < 8 for x in position[:2])
+class Rook(Piece):
+    letter = 'R'
 
-    def symbol(self):
-        return 'R' if self.color == 'White' else 'r'
+    def target_indices(self, index, board):
+        return slide_targets(ROOK_RAYS[index], board.squares, self.color)
 
-class Bishop:
-    def __init__(self, color):
-        self.color = color
+class Bishop(Piece):
+    letter = 'B'
 
-    def valid_moves(self, position, board):
-        valid_moves = []
-        for i in range(12):
-            for j in range(i + 1, 12):
-                for delta in range(1, 8):
-                    for sign1 in [-1, 1]:
-                        for sign2 in [-1, 1]:
-                            new_position = list(position)
-                            new_position[i] += sign1 * delta
-                            new_position[j] += sign2 * delta
-                            new_position = tuple(new_position)
-                            if self.is_valid_position(new_position) and not board.get_piece(new_position):
-                                valid_moves.append(new_position)
-                            else:
-                                break
-        return valid_moves
+    def target_indices(self, index, board):
+        return slide_targets(BISHOP_RAYS[index], board.squares, self.color)
 
-    @staticmethod
-    def is_valid_position(position):
-        return all(0 <= x < 8 for x in position[:2])
+class Queen(Piece):
+    letter = 'Q'
 
-    def symbol(self):
-        return 'B' if self.color == 'White' else 'b'
+    def target_indices(self, index, board):
+        return slide_targets(ROOK_RAYS[index], board.squares, self.color) + slide_targets(BISHOP_RAYS[index], board.squares, self.color)
 
-class Queen:
-    def __init__(self, color):
-        self.color = color
-        self.rook = Rook(color)
-        self.bishop = Bishop(color)
+class Knight(Piece):
+    letter = 'N'
 
-    def valid_moves(self, position, board):
-        return self.rook.valid_moves(position, board) + self.bishop.valid_moves(position, board)
+    def target_indices(self, index, board):
+        return jump_targets(KNIGHT_JUMPS[index], board.squares, self.color)
 
-    def symbol(self):
-        return 'Q' if self.color == 'White' else 'q'
+class Pawn(Piece):
+    letter = 'P'
 
-class Knight:
-    def __init__(self, color):
-        self.color = color
-        self.moves = self.generate_knight_moves()
+    def target_indices(self, index, board):
+        squares = board.squares
+        targets = []
 
-    def generate_knight_moves(self):
-        moves = []
-        for i in range(12):
-            for j in range(i + 1, 12):
-                moves.extend([
-                    self.create_move(i, j, 2, 1),
-                    self.create_move(i, j, 2, -1),
-                    self.create_move(i, j, -2, 1),
-                    self.create_move(i, j, -2, -1),
-                    self.create_move(i, j, 1, 2),
-                    self.create_move(i, j, 1, -2),
-                    self.create_move(i, j, -1, 2),
-                    self.create_move(i, j, -1, -2)
-                ])
-        return moves
+        # Forward moves; the two-square push only exists from the starting rank
+        for target in PAWN_PUSHES[self.color][index]:
+            if target in squares:
+                break
+            targets.append(target)
 
-    def create_move(self, i, j, a, b):
-        move = [0] * 12
-        move[i] = a
-        move[j] = b
-        return tuple(move)
+        # Captures
+        for target in PAWN_CAPTURES[self.color][index]:
+            piece = squares.get(target)
+            if piece and piece.color != self.color:
+                targets.append(target)
 
-    def valid_moves(self, position, board):
-        valid_moves = []
-        for move in self.moves:
-            new_position = tuple(pos + delta for pos, delta in zip(position, move))
-            if self.is_valid_position(new_position) and not board.get_piece(new_position):
-                valid_moves.append(new_position)
-        return valid_moves
+        return targets
 
-    @staticmethod
-    def is_valid_position(position):
-        return all(0 <= x < 8 for x in position[:2])
+    def promote(self, position, board, new_piece):
+        if position[0] == PROMOTION_RANK[self.color]:
+            board.board[position] = new_piece
 
-    def symbol(self):
-        return 'N' if self.color == 'White' else 'n'
+# The original dict-of-tuples storage with naive move generation that walks coordinate
+# tuples on every call, kept as a reference for cross-checking and benchmarking the
+# indexed Board12D and its move tables
+class DictBoard12D:
+    def __init__(self):
+        self.board = {}
 
-class Pawn:
-    def __init__(self, color):
-        self.color = color
+    def place_piece(self, piece, position):
+        self.board[position] = piece
 
-    def valid_moves(self, position, board):
-        valid_moves = []
-        direction = 1 if self.color == 'White' else -1
-
-        # Forward move
-        forward_one = list(position)
-        forward_one[0] += direction
-        forward_one = tuple(forward_one)
-        if self.is_valid_position(forward_one) and not board.get_piece(forward_one):
-            valid_moves.append(forward_one)
+    def get_piece(self, position):
+        return self.board.get(position, None)
 
-            # Forward two if it's the first move
-            if (self.color == 'White' and position[0] == 1) or (self.color == 'Black' and position[0] == 6):
-                forward_two = list(position)
-                forward_two[0] += 2 * direction
-                forward_two = tuple(forward_two)
-                if self.is_valid_position(forward_two) and not board.get_piece(forward_two):
+def reference_valid_moves(piece, position, board):
+    valid_moves = []
+
+    def shifted(offset, distance=1):
+        new_position = list(position)
+        for axis, step in offset:
+            new_position[axis] += step * distance
+        return tuple(new_position)
+
+    def can_enter(new_position):
+        target = board.get_piece(new_position)
+        return target is None or target.color != piece.color
+
+    if isinstance(piece, (Rook, Bishop, Queen)):
+        directions = []
+        if isinstance(piece, (Rook, Queen)):
+            directions += ROOK_DIRECTIONS
+        if isinstance(piece, (Bishop, Queen)):
+            directions += BISHOP_DIRECTIONS
+        for direction in directions:
+            distance = 1
+            while is_on_board(shifted(direction, distance)):
+                new_position = shifted(direction, distance)
+                if can_enter(new_position):
+                    valid_moves.append(new_position)
+                if board.get_piece(new_position):
+                    break
+                distance += 1
+    elif isinstance(piece, (King, Knight)):
+        for offset in KING_OFFSETS if isinstance(piece, King) else KNIGHT_OFFSETS:
+            new_position = shifted(offset)
+            if is_on_board(new_position) and can_enter(new_position):
+                valid_moves.append(new_position)
+    elif isinstance(piece, Pawn):
+        direction = 1 if piece.color == 'White' else -1
+        forward_one = shifted([(0, direction)])
+        if is_on_board(forward_one) and not board.get_piece(forward_one):
+            valid_moves.append(forward_one)
+            if (piece.color == 'White' and position[0] == 1) or (piece.color == 'Black' and position[0] == 6):
+                forward_two = shifted([(0, 2 * direction)])
+                if is_on_board(forward_two) and not board.get_piece(forward_two):
                     valid_moves.append(forward_two)
+        for i in range(1, BOARD_DIMENSIONS):
+            for sign in [1, -1]:
+                capture = shifted([(0, direction), (i, sign)])
+                target = board.get_piece(capture) if is_on_board(capture) else None
+                if target and target.color != piece.color:
+                    valid_moves.append(capture)
+    return valid_moves
+
+PIECE_CLASSES = [King, Queen, Rook, Bishop, Knight, Pawn]
+
+# The usual 32 pieces on the slice where all extra axes are 0. Pawns advance along axis 0,
+# so each side's back rank lies along axis 1 at the near end of axis 0.
+def standard_board12d():
+    board = Board12D()
+    back_rank = [Rook, Knight, Bishop, Queen, King, Bishop, Knight, Rook]
+    rest = (0,) * (BOARD_DIMENSIONS - 2)
+    for y, piece_class in enumerate(back_rank):
+        board.place_piece(piece_class('White'), (0, y, *rest))
+        board.place_piece(Pawn('White'), (1, y, *rest))
+        board.place_piece(Pawn('Black'), (6, y, *rest))
+        board.place_piece(piece_class('Black'), (7, y, *rest))
+    return board
+
+# Random layout with one king per side. Only the first free_axes axes vary, so a small
+# free_axes packs the pieces into a dense corner of the board.
+def random_board12d_layout(num_pieces=32, seed=0, free_axes=BOARD_DIMENSIONS):
+    rng = random.Random(seed)
+    layout = {}
+
+    def random_empty_position():
+        while True:
+            position = tuple(rng.randrange(size) if axis < free_axes else 0 for axis, size in enumerate(BOARD_SHAPE))
+            if position not in layout:
+                return position
+
+    layout[random_empty_position()] = King('White')
+    layout[random_empty_position()] = King('Black')
+    while len(layout) < num_pieces:
+        layout[random_empty_position()] = rng.choice(PIECE_CLASSES[1:])(rng.choice(['White', 'Black']))
+    return layout
+
+def reference_is_in_check(board, color):
+    king_position = None
+    for pos, piece in board.board.items():
+        if isinstance(piece, King) and piece.color == color:
+            king_position = pos
+            break
+    if not king_position:
+        return False
+    for pos, piece in board.board.items():
+        if piece.color != color:
+            if king_position in reference_valid_moves(piece, pos, board):
+                return True
+    return False
+
+def reference_is_checkmate(board, color):
+    if not reference_is_in_check(board, color):
+        return False
+    for pos, piece in list(board.board.items()):
+        if piece.color == color:
+            for move in reference_valid_moves(piece, pos, board):
+                original_piece = board.board.pop(move, None)
+                board.board[move] = board.board.pop(pos)
+                escaped = not reference_is_in_check(board, color)
+                board.board[pos] = board.board.pop(move)
+                if original_piece:
+                    board.board[move] = original_piece
+                if escaped:
+                    return False
+    return True
+
+# Check and mate detection on dense random positions, Board12D against the reference scans
+def benchmark_board12d_checks(layouts=6, num_pieces=40, free_axes=3):
+    pairs = []
+    for seed in range(layouts):
+        board = Board12D()
+        reference = DictBoard12D()
+        for position, piece in random_board12d_layout(num_pieces, seed, free_axes).items():
+            board.place_piece(piece, position)
+            reference.place_piece(piece, position)
+        pairs.append((board, reference))
+
+    # Fill the lazily built move tables first so only steady-state lookups are timed
+    for board, _ in pairs:
+        for color in ('White', 'Black'):
+            board.is_checkmate(color)
+
+    for name, fast, slow in (("is_in_check", Board12D.is_in_check, reference_is_in_check),
+                             ("is_checkmate", Board12D.is_checkmate, reference_is_checkmate)):
+        start = time.perf_counter()
+        fast_results = [fast(board, color) for board, _ in pairs for color in ('White', 'Black')]
+        fast_time = time.perf_counter() - start
+        start = time.perf_counter()
+        slow_results = [slow(reference, color) for _, reference in pairs for color in ('White', 'Black')]
+        slow_time = time.perf_counter() - start
+        calls = len(fast_results)
+        agree = sum(1 for a, b in zip(fast_results, slow_results) if a == b)
+        print(f"{name:13} Board12D {fast_time / calls * 1e6:10.1f} us/call   reference {slow_time / calls * 1e6:10.1f} us/call"
+              f"   ({slow_time / fast_time:.0f}x, agree {agree}/{calls})")
+
+# Moves generated per second by every piece on random layouts, indexed Board12D against the
+# dict-of-tuples reference
+def benchmark_board12d_movegen(layouts=20, num_pieces=32, repeat=3):
+    boards = []
+    for seed in range(layouts):
+        board = Board12D()
+        reference = DictBoard12D()
+        for position, piece in random_board12d_layout(num_pieces, seed).items():
+            board.place_piece(piece, position)
+            reference.place_piece(piece, position)
+        boards.append((board, reference))
+
+    def run(generate, use_reference):
+        moves = 0
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for board, reference in boards:
+                target = reference if use_reference else board
+                for position, piece in reference.board.items():
+                    moves += len(generate(piece, position, target))
+        return moves, time.perf_counter() - start
+
+    dict_moves, dict_time = run(reference_valid_moves, True)
+    indexed_moves, indexed_time = run(lambda piece, position, board: piece.valid_moves(position, board), False)
+    print(f"dict Board12D:    {dict_moves / dict_time:12,.0f} moves/s")
+    print(f"indexed Board12D: {indexed_moves / indexed_time:12,.0f} moves/s ({dict_time / indexed_time:.1f}x)")
+    return dict_moves / dict_time, indexed_moves / indexed_time
+
+# Material values in pawns for the 2D (python-chess) search
+MATERIAL_VALUES = {
+    chess.PAWN: 1,
+    chess.KNIGHT: 3,
+    chess.BISHOP: 3,
+    chess.ROOK: 5,
+    chess.QUEEN: 9,
+    chess.KING: 0
+}
+
+def build_piece_square_tables():
+    # Small centralization and pawn-advance bonuses from White's point of view. All values
+    # are multiples of 1/32 so running float totals stay exact under push/pop.
+    tables = {}
+    for piece_type in MATERIAL_VALUES:
+        table = []
+        for square in chess.SQUARES:
+            file, rank = chess.square_file(square), chess.square_rank(square)
+            center = 3 - max(abs(2 * file - 7), abs(2 * rank - 7)) // 2
+            if piece_type == chess.PAWN:
+                bonus = (rank - 1) / 32 if 0 < rank < 7 else 0
+            elif piece_type in (chess.KNIGHT, chess.BISHOP):
+                bonus = center / 16
+            elif piece_type == chess.QUEEN:
+                bonus = center / 32
+            else:
+                bonus = 0
+            table.append(bonus)
+        tables[piece_type] = table
+    return tables
+
+PIECE_SQUARE_TABLES = build_piece_square_tables()
+
+# Evaluation kept as a running total that is updated on every push/pop instead of rescanning
+# the board at each leaf. Any object with reset/push/pop/evaluate can replace it in AIPlayer.
+class IncrementalEvaluator:
+    def __init__(self, material_values=None, piece_square_tables=None):
+        self.material_values = material_values or MATERIAL_VALUES
+        self.piece_square_tables = piece_square_tables
+        self.score = 0
+        self.stack = []
+
+    def piece_score(self, piece_type, color, square):
+        value = self.material_values[piece_type]
+        if self.piece_square_tables is not None:
+            if color == chess.BLACK:
+                square = chess.square_mirror(square)
+            value += self.piece_square_tables[piece_type][square]
+        return value if color == chess.WHITE else -value
+
+    def compute(self, board):
+        return sum(self.piece_score(piece.piece_type, piece.color, square) for square, piece in board.piece_map().items())
+
+    def reset(self, board):
+        self.score = self.compute(board)
+        self.stack = []
+
+    # Must be called before board.push(move)
+    def push(self, board, move):
+        if not move:
+            self.stack.append(0)
+            return
+        piece = board.piece_at(move.from_square)
+        color = piece.color
+        delta = self.piece_score(move.promotion or piece.piece_type, color, move.to_square) - self.piece_score(piece.piece_type, color, move.from_square)
+        if board.is_castling(move):
+            rank = chess.square_rank(move.from_square)
+            kingside = board.is_kingside_castling(move)
+            king_to = chess.square(6 if kingside else 2, rank)
+            rook_from = chess.square(7 if kingside else 0, rank)
+            rook_to = chess.square(5 if kingside else 3, rank)
+            delta = (self.piece_score(chess.KING, color, king_to) - self.piece_score(chess.KING, color, move.from_square)
+                     + self.piece_score(chess.ROOK, color, rook_to) - self.piece_score(chess.ROOK, color, rook_from))
+        elif board.is_en_passant(move):
+            captured_square = move.to_square - 8 if color == chess.WHITE else move.to_square + 8
+            delta -= self.piece_score(chess.PAWN, not color, captured_square)
+        else:
+            captured = board.piece_at(move.to_square)
+            if captured:
+                delta -= self.piece_score(captured.piece_type, captured.color, move.to_square)
+        self.score += delta
+        self.stack.append(delta)
+
+    def pop(self):
+        self.score -= self.stack.pop()
+
+    def evaluate(self, board):
+        return self.score
+
+# Positions used to check an incremental evaluator against a full recount
+EVAL_REGRESSION_FENS = [
+    chess.STARTING_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+    "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+    "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+]
+
+def verify_evaluator(evaluator, fens=None, plies=40, seed=0):
+    # Random walks from each position, comparing the running total with a full recount (and
+    # with AIPlayer.evaluate_board for material-only evaluators) after every push and pop
+    rng = random.Random(seed)
+    mismatches = []
+    for fen in fens or EVAL_REGRESSION_FENS:
+        board = chess.Board(fen)
+        evaluator.reset(board)
+        for _ in range(plies):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            move = rng.choice(moves)
+            evaluator.push(board, move)
+            board.push(move)
+            expected = evaluator.compute(board)
+            if evaluator.piece_square_tables is None:
+                expected = AIPlayer.evaluate_board(board)
+            if evaluator.evaluate(board) != expected:
+                mismatches.append((board.fen(), evaluator.evaluate(board), expected))
+        while board.move_stack:
+            evaluator.pop()
+            board.pop()
+            if evaluator.evaluate(board) != evaluator.compute(board):
+                mismatches.append((board.fen(), evaluator.evaluate(board), evaluator.compute(board)))
+    return mismatches
+
+# verify_evaluator for the material-only and the piece-square evaluator, printing the first
+# mismatches of each. Returns False if there are any.
+def run_verify_evaluator(plies=40):
+    ok = True
+    for name, evaluator in (("material", IncrementalEvaluator()),
+                            ("piece-square", IncrementalEvaluator(piece_square_tables=PIECE_SQUARE_TABLES))):
+        mismatches = verify_evaluator(evaluator, plies=plies)
+        for fen, value, expected in mismatches[:5]:
+            print(f"  {fen}: incremental {value}, recomputed {expected}")
+        print(f"{name:12} {'OK' if not mismatches else 'FAILED'}: {len(mismatches)} mismatches")
+        ok = ok and not mismatches
+    return ok
+
+# Transposition table bound types
+TT_EXACT = 0
+TT_LOWER = 1
+TT_UPPER = 2
+
+# Rough size of one stored entry (slot pointer + tuple + boxed ints), used to turn a
+# memory budget in megabytes into a slot count
+TT_ENTRY_BYTES = 128
+
+# Fixed-size transposition table keyed by the Zobrist hash of a chess.Board position
+class TranspositionTable:
+    def __init__(self, hash_mb=16, replacement='depth'):
+        if replacement not in ('depth', 'always'):
+            raise ValueError("Unknown replacement policy")
+        self.size = max(1, int(hash_mb * 1024 * 1024) // TT_ENTRY_BYTES)
+        self.replacement = replacement
+        self.table = [None] * self.size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        # Entries from earlier searches stay usable but lose their replacement priority
+        self.generation = (self.generation + 1) & 0xFF
+
+    def clear(self):
+        self.table = [None] * self.size
+        self.generation = 0
+        self.hits = self.misses = self.stores = self.overwrites = 0
+
+    def probe(self, key):
+        entry = self.table[key % self.size]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, value, flag, move):
+        index = key % self.size
+        entry = self.table[index]
+        if entry is not None and self.replacement == 'depth':
+            # Depth-preferred: keep a deeper entry for a different position from this search
+            if entry[0] != key and entry[5] == self.generation and entry[1] > depth:
+                return
+            # Keep the old best move if the new result has none to offer
+            if entry[0] == key and move is None:
+                move = entry[4]
+        if entry is not None and entry[0] != key:
+            self.overwrites += 1
+        self.table[index] = (key, depth, value, flag, move, self.generation)
+        self.stores += 1
+
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def usage(self):
+        # Permille of sampled slots filled in the current search, like UCI hashfull
+        sample = self.table[:1000]
+        used = sum(1 for entry in sample if entry is not None and entry[5] == self.generation)
+        return used * 1000 // len(sample)
+
+# Score of a tablebase win in pawns, far above any material balance; shrinks with the ply
+# so the search prefers the quickest won endgame it can see
+TABLEBASE_WIN = 1000
+
+# Score for being mated at the root; like tablebase wins it shrinks by one per ply, so the search
+# prefers the quickest mate and the slowest loss
+MATE_SCORE = 100000
+
+# Syzygy tablebases from local directories (separated by os.pathsep). WDL and DTZ probes are
+# cached by Zobrist hash in an LRU of cache_size entries. Positions with castling rights or more
+# than max_pieces pieces are never probed.
+class Tablebase:
+    def __init__(self, path, max_pieces=None, cache_size=65536):
+        self.path = path
+        self.cache_size = cache_size
+        self.tables = chess.syzygy.Tablebase()
+        for directory in path.split(os.pathsep):
+            if directory:
+                self.tables.add_directory(directory)
+        largest = max((len(name) - 1 for name in self.tables.wdl), default=0)
+        self.max_pieces = min(max_pieces, largest) if max_pieces is not None else largest
+        self.requested_pieces = max_pieces
+        self.cache = collections.OrderedDict()
+        self.hits = 0
+        self.probes = 0
+
+    # Open tables cannot be pickled, so parallel search workers reopen the directories
+    def __getstate__(self):
+        return {'path': self.path, 'max_pieces': self.requested_pieces, 'cache_size': self.cache_size}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'], state['max_pieces'], state['cache_size'])
+
+    def can_probe(self, board):
+        return chess.popcount(board.occupied) <= self.max_pieces and not board.castling_rights
+
+    def cached(self, board, kind, probe):
+        key = (chess.polyglot.zobrist_hash(board), kind)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return self.cache[key]
+        self.probes += 1
+        try:
+            result = probe(board)
+        except KeyError:
+            # MissingTableError: this material combination is not on disk
+            result = None
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
+
+    # Win/draw/loss for the side to move: 2 win, 1 cursed win, 0 draw, -1 blessed loss, -2 loss
+    def probe_wdl(self, board):
+        if not self.can_probe(board):
+            return None
+        return self.cached(board, 'wdl', self.tables.probe_wdl)
+
+    # Distance to the next zeroing move (capture or pawn move), signed like WDL
+    def probe_dtz(self, board):
+        if not self.can_probe(board):
+            return None
+        return self.cached(board, 'dtz', self.tables.probe_dtz)
+
+    # Best root move by DTZ: win if possible (preferring zeroing moves, then the shortest DTZ),
+    # otherwise draw, otherwise lose as slowly as possible. None if any probe fails.
+    def best_move(self, board):
+        if not self.can_probe(board):
+            return None
+        best_move = None
+        best_key = None
+        for move in board.legal_moves:
+            zeroing = board.is_zeroing(move)
+            board.push(move)
+            try:
+                if board.is_checkmate():
+                    key = (3,)
+                else:
+                    wdl = self.probe_wdl(board)
+                    dtz = self.probe_dtz(board)
+                    if wdl is None or dtz is None:
+                        return None
+                    # Both probes are from the opponent's point of view after our move
+                    if -wdl > 0:
+                        key = (-wdl, zeroing, -abs(dtz))
+                    else:
+                        key = (-wdl, False, abs(dtz))
+            finally:
+                board.pop()
+            if best_key is None or key > best_key:
+                best_key = key
+                best_move = move
+        return best_move
 
-        # Captures
-        for i in range(1, 12):
-            capture = list(position)
-            capture[0] += direction
-            capture[i] += 1
-            capture = tuple(capture)
-            if self.is_valid_position(capture) and board.get_piece(capture) and board.get_piece(capture).color != self.color:
-                valid_moves.append(capture)
-
-            capture = list(position)
-            capture[0] += direction
-            capture[i] -= 1
-            capture = tuple(capture)
-            if self.is_valid_position(capture) and board.get_piece(capture) and board.get_piece(capture).color != self.color:
-                valid_moves.append(capture)
-
-        return valid_moves
-
-    def promote(self, position, board, new_piece):
-        if (self.color == 'White' and position[0] == 7) or (self.color == 'Black' and position[0] == 0):
-            board.board[position] = new_piece
-
-    @staticmethod
-    def is_valid_position(position):
-        return all(0 <= x < 8 for x in position[:2])
+    def close(self):
+        self.tables.close()
+
+# Width of a null (zero) window; scores are multiples of 1/32 pawn, so this is far below any
+# real difference
+NULL_WINDOW = 1e-6
+
+# Aspiration windows in pawns: the first window around the previous score, and the width past
+# which a failing side is opened up completely
+ASPIRATION_WINDOW = 0.5
+ASPIRATION_MAX_WINDOW = 4
+ASPIRATION_MIN_DEPTH = 3
+
+# Null-move pruning: minimum depth, depth reduction, and the depth from which cutoffs are verified
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_VERIFY_DEPTH = 6
+
+# Late-move reductions: quiet moves from this index on, at this depth or more, are reduced by
+# one ply, and by two from LMR_LATE_MOVES on
+LMR_MIN_MOVES = 3
+LMR_MIN_DEPTH = 3
+LMR_LATE_MOVES = 8
+
+# Upper bound on iterative deepening when only a time or node budget is given
+MAX_SEARCH_DEPTH = 64
+
+# Killer slots are kept per ply; extensions can push the ply past the nominal depth
+MAX_PLY = 128
+
+# Mate and tablebase scores depend on the distance from the root, so the transposition table
+# stores them relative to the node and converts them back on a hit
+MATE_BOUND = TABLEBASE_WIN - MAX_PLY
+
+def score_to_tt(value, ply):
+    if value >= MATE_BOUND:
+        return value + ply
+    if value <= -MATE_BOUND:
+        return value - ply
+    return value
+
+def score_from_tt(value, ply):
+    if value >= MATE_BOUND:
+        return value - ply
+    if value <= -MATE_BOUND:
+        return value + ply
+    return value
+
+# Kings and at most one minor piece cannot mate; checked from the bitboards at every node
+def insufficient_material(board):
+    return not (board.pawns | board.rooks | board.queens) and chess.popcount(board.occupied) <= 3
+
+# Move ordering scores: hash/PV move, then captures (MVV-LVA), promotions, killers, history
+ORDER_PV = 1000000
+ORDER_CAPTURE = 100000
+ORDER_PROMOTION = 90000
+ORDER_KILLER = 80000
+HISTORY_MAX = 50000
+
+# Quiescence delta pruning margin in pawns: captures that cannot lift the stand-pat score
+# back to alpha even with this much positional slack are skipped
+DELTA_MARGIN = 2
+
+ZERO_HISTORY = [0] * 4096
+
+# Raised inside the search when the time or node budget runs out
+class SearchAborted(Exception):
+    pass
+
+# Filled in by AIPlayer during each search. Per-iteration values describe the last
+# completed iteration; the counters cover the whole search.
+class SearchStats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.depth = 0
+        self.seldepth = 0
+        self.score = None
+        self.pv = []
+        self.nodes = 0
+        self.qnodes = 0
+        self.time = 0.0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.tt_hit_rate = 0.0
+        self.hashfull = 0
+        self.tbhits = 0
+        self.iteration_nodes = []
+        self.hot_functions = []
+
+    def nps(self):
+        return int(self.nodes / self.time) if self.time > 0 else 0
+
+    # Effective branching factor: growth in nodes from one iteration to the next
+    def branching_factor(self):
+        if len(self.iteration_nodes) < 2 or self.iteration_nodes[-2] == 0:
+            return 0.0
+        return self.iteration_nodes[-1] / self.iteration_nodes[-2]
+
+    # Share of beta cutoffs produced by the first move searched; high means good ordering
+    def cutoff_rate(self):
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def as_dict(self):
+        return {
+            'depth': self.depth,
+            'seldepth': self.seldepth,
+            'score': self.score,
+            'pv': [move.uci() for move in self.pv],
+            'nodes': self.nodes,
+            'qnodes': self.qnodes,
+            'time': self.time,
+            'nps': self.nps(),
+            'branching_factor': self.branching_factor(),
+            'cutoff_rate': self.cutoff_rate(),
+            'tt_hit_rate': self.tt_hit_rate,
+            'tbhits': self.tbhits,
+        }
 
-    def symbol(self):
-        return 'P' if self.color == 'White' else 'p'
+    # ('cp', centipawns) or ('mate', moves to mate, negative when being mated), from the side
+    # to move's point of view
+    def uci_score(self):
+        # Clamped so an unbounded score reads as mate now instead of failing to convert
+        score = max(-MATE_SCORE, min(MATE_SCORE, self.score))
+        if abs(score) >= MATE_SCORE - MAX_PLY:
+            plies = int(MATE_SCORE - abs(score))
+            return 'mate', (plies + 1) // 2 if score > 0 else -(plies // 2)
+        return 'cp', round(score * 100)
+
+    # UCI info line
+    def info_line(self):
+        line = f"info depth {self.depth}"
+        if self.seldepth:
+            line += f" seldepth {self.seldepth}"
+        if self.score is not None:
+            kind, value = self.uci_score()
+            line += f" score {kind} {value}"
+        line += f" nodes {self.nodes} nps {self.nps()} time {int(self.time * 1000)} hashfull {self.hashfull}"
+        if self.tbhits:
+            line += f" tbhits {self.tbhits}"
+        if self.pv:
+            line += " pv " + " ".join(move.uci() for move in self.pv)
+        return line
+
+# Number of functions kept in SearchStats.hot_functions when profiling
+PROFILE_TOP_FUNCTIONS = 15
 
 # AI Player class for the 12D AI system
 class AIPlayer:
-    def __init__(self, color, depth=3):
+    def __init__(self, color, depth=3, hash_mb=16, tt_replacement='depth', move_ordering=True, evaluator=None,
+                 quiescence=True, workers=1, deterministic=False, info_callback=None, profile_dir=None, book=None, tablebase=None,
+                 pvs=True, null_move=True, lmr=True, check_extensions=True, aspiration=True):
         self.color = color
         self.depth = depth
+        self.workers = workers
+        self.deterministic = deterministic
+        self.pool = None
+        self.stop_requested = False
+        # Shared with the worker processes of parallel_search so stop() reaches them too
+        self.stop_event = None
+        self.evaluator = evaluator or IncrementalEvaluator()
+        self.use_quiescence = quiescence
+        self.qnodes = 0
+        # Selective search features, each of which can be switched off on its own. A deterministic
+        # search must pick the same move serially and split across workers, whose root moves get
+        # other windows, so it leaves out the features whose result depends on the window.
+        self.pvs = pvs
+        self.null_move = null_move and not deterministic
+        self.lmr = lmr and not deterministic
+        self.check_extensions = check_extensions
+        self.aspiration = aspiration and not deterministic
+        self.aspiration_researches = 0
+        self.root_depth = 0
+        self.tt = TranspositionTable(hash_mb, tt_replacement)
+        self.move_ordering = move_ordering
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [[0] * 4096, [0] * 4096]
+        self.root_ply = 0
+        # Zobrist keys from the last capture or pawn move down to the parent of the current node
+        self.key_history = []
+        self.nodes = 0
+        self.max_nodes = None
+        self.deadline = None
+        # Deadline set from another thread by set_time_limit before the search got to start_search
+        self.deadline_lock = threading.Lock()
+        self.pending_deadline = None
+        self.root_best = None
+        self.completed_depth = 0
+        self.stats = SearchStats()
+        # Called with a UCI-style info line after every completed iteration
+        self.info_callback = info_callback
+        # When set, every search runs under cProfile and dumps its stats into this directory
+        self.profile_dir = profile_dir
+        self.searches = 0
+        # OpeningBook consulted before every search
+        self.book = book
+        # Tablebase probed by DTZ at the root and by WDL inside the search
+        self.tablebase = tablebase
+        self.tbhits = 0
+
+    def get_best_move(self, board, limit=None):
+        try:
+            return self.choose_move(board, limit)
+        finally:
+            # A stop request only ever applies to the search that was running
+            self.clear_stop()
+
+    def choose_move(self, board, limit):
+        if self.book is not None:
+            move = self.book.choose(board)
+            if move is not None:
+                self.stats.reset()
+                self.stats.pv = [move]
+                return move
+        if self.tablebase is not None:
+            move = self.tablebase.best_move(board)
+            if move is not None:
+                self.stats.reset()
+                self.stats.pv = [move]
+                self.stats.tbhits = 1
+                return move
+        # Without a limit this is the classic fixed-depth search at self.depth
+        if limit is None or (limit.time is None and limit.depth is None and limit.nodes is None):
+            limit = chess.engine.Limit(depth=self.depth)
+        self.start_search(board, limit)
+        max_depth = limit.depth if limit.depth is not None else MAX_SEARCH_DEPTH
+        profiler = cProfile.Profile() if self.profile_dir is not None else None
+        if profiler is not None:
+            profiler.enable()
+        try:
+            if not any(board.generate_legal_moves()):
+                # Mated or stalemated: nothing to search, and the root score would be -inf
+                self.stats.score = -MATE_SCORE if board.is_check() else 0
+                return None
+            if self.workers > 1:
+                return self.parallel_search(board, max_depth)
+            return self.iterative_deepening(board, max_depth)
+        finally:
+            self.update_stats()
+            if profiler is not None:
+                profiler.disable()
+                self.record_profile(profiler)
+            self.searches += 1
+
+    def update_stats(self):
+        stats = self.stats
+        stats.nodes = self.nodes
+        stats.qnodes = self.qnodes
+        stats.time = time.monotonic() - self.search_start
+        stats.tt_hit_rate = self.tt.hit_rate()
+        stats.hashfull = self.tt.usage()
+        stats.tbhits = self.tbhits
+
+    # Called after each completed iteration: records depth, score and PV and streams an info line
+    def report_iteration(self, board, depth, value, best_move):
+        self.update_stats()
+        stats = self.stats
+        stats.depth = depth
+        stats.score = value
+        stats.pv = self.principal_variation(board, best_move, depth)
+        stats.iteration_nodes.append(self.nodes)
+        if self.info_callback is not None:
+            self.info_callback(stats.info_line())
+
+    # Best move followed by the hash moves of the positions it leads to
+    def principal_variation(self, board, best_move, depth):
+        pv = []
+        board = board.copy(stack=False)
+        move = best_move
+        seen = set()
+        while move is not None and len(pv) < depth and board.is_legal(move):
+            pv.append(move)
+            board.push(move)
+            key = chess.polyglot.zobrist_hash(board)
+            if key in seen:
+                break
+            seen.add(key)
+            entry = self.tt.probe(key)
+            move = entry[4] if entry is not None else None
+        return pv
+
+    # Keeps the functions with the most own time in stats.hot_functions and dumps the full
+    # profile to profile_dir (open with pstats or snakeviz)
+    def record_profile(self, profiler):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        profiler.dump_stats(os.path.join(self.profile_dir, f"search-{os.getpid()}-{self.searches:04d}.prof"))
+        rows = []
+        for (filename, line, name), (_, calls, own_time, total_time, _) in pstats.Stats(profiler).stats.items():
+            rows.append((f"{os.path.basename(filename)}:{line}({name})", calls, own_time, total_time))
+        rows.sort(key=lambda row: row[2], reverse=True)
+        self.stats.hot_functions = rows[:PROFILE_TOP_FUNCTIONS]
+
+    # Asks a search running on another thread to return its best move so far
+    def stop(self):
+        self.stop_requested = True
+        if self.stop_event is not None:
+            self.stop_event.set()
+
+    def clear_stop(self):
+        self.stop_requested = False
+        if self.stop_event is not None:
+            self.stop_event.clear()
+        with self.deadline_lock:
+            self.pending_deadline = None
+
+    # Gives the running search, or the one about to start, `seconds` from now; safe to call from
+    # another thread, as UCI ponderhit does
+    def set_time_limit(self, seconds):
+        with self.deadline_lock:
+            self.pending_deadline = time.monotonic() + seconds
+            self.deadline = self.pending_deadline
+
+    # Searches the position after the opponent's expected reply (the hash move after our own
+    # move) until stop() is called, so the table is already warm when our turn comes
+    def ponder(self, board):
+        entry = self.tt.probe(chess.polyglot.zobrist_hash(board))
+        if entry is None or entry[4] is None or not board.is_legal(entry[4]):
+            return None
+        board = board.copy()
+        board.push(entry[4])
+        if board.is_game_over():
+            return None
+        return self.get_best_move(board, chess.engine.Limit(depth=MAX_SEARCH_DEPTH))
+
+    def iterative_deepening(self, board, max_depth):
+        best_move = None
+        best_value = None
+        for depth in range(1, max_depth + 1):
+            try:
+                best_move, best_value = self.aspiration_search(board, depth, best_move, best_value)
+            except SearchAborted:
+                # Keep the move of the last completed iteration; only fall back to the
+                # partial result when not even depth 1 finished
+                if best_move is None:
+                    best_move = self.root_best
+                break
+            self.completed_depth = depth
+            self.report_iteration(board, depth, best_value, best_move)
+            # A mate within the nominal depth cannot get any shorter
+            if MATE_SCORE - abs(best_value) <= depth:
+                break
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                break
+
+        if best_move is None:
+            best_move = next(iter(board.legal_moves), None)
+        return best_move
 
-    def get_best_move(self, board):
+    # Searches the root in a window around the previous iteration's score, widening the side
+    # that failed until the score falls inside it
+    def aspiration_search(self, board, depth, previous_best, previous_value):
+        if not self.aspiration or depth < ASPIRATION_MIN_DEPTH or previous_value is None:
+            return self.search_root(board, depth, previous_best)
+        window = ASPIRATION_WINDOW
+        alpha = previous_value - window
+        beta = previous_value + window
+        while True:
+            best_move, best_value = self.search_root(board, depth, previous_best, alpha, beta)
+            if best_value <= alpha:
+                alpha = -float('inf') if window >= ASPIRATION_MAX_WINDOW else best_value - window
+            elif best_value >= beta:
+                beta = float('inf') if window >= ASPIRATION_MAX_WINDOW else best_value + window
+            else:
+                return best_move, best_value
+            self.aspiration_researches += 1
+            previous_best = best_move
+            window *= 2
+
+    # new_search is False when a parallel_search worker takes another root move of the same
+    # search, so its table and history carry over from the moves it searched before
+    def start_search(self, board, limit, new_search=True):
+        if new_search and self.deterministic:
+            # Nothing carried over from earlier searches may influence values or move order
+            self.tt.clear()
+            self.history = [[0] * 4096, [0] * 4096]
+        elif new_search:
+            self.tt.new_search()
+            # History from earlier moves of the game is still a useful hint, but should not dominate
+            for table in self.history:
+                for i in range(4096):
+                    table[i] >>= 1
+        self.evaluator.reset(board)
+        self.nodes = 0
+        self.qnodes = 0
+        self.tbhits = 0
+        self.aspiration_researches = 0
+        self.max_nodes = limit.nodes
+        with self.deadline_lock:
+            if self.pending_deadline is not None:
+                self.deadline = self.pending_deadline
+            else:
+                self.deadline = time.monotonic() + limit.time if limit.time is not None else None
+        self.root_best = None
+        self.root_depth = 0
+        self.completed_depth = 0
+        self.root_ply = len(board.move_stack)
+        # Rebuilt every search, so an aborted search may leave it unbalanced
+        self.key_history = self.game_keys(board)
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.stats.reset()
+        self.search_start = time.monotonic()
+
+    # Root-splitting search: the first root move of an iteration is searched on its own to get a
+    # bound, then the remaining root moves are searched in worker processes against that bound.
+    # The best score wins, first in root order on ties, like search_root.
+    def parallel_search(self, board, max_depth):
+        if self.pool is None:
+            self.stop_event = multiprocessing.Event()
+            self.pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers, initializer=init_search_worker,
+                initargs=(self.worker_options(), self.stop_event))
         best_move = None
-        best_value = -float('inf') if self.color == chess.WHITE else float('inf')
-        
-        for move in board.legal_moves:
+        for depth in range(1, max_depth + 1):
+            moves = self.order_moves(board, board.legal_moves, best_move, 0)
+            if not moves or self.stop_requested:
+                break
+            deadline = None
+            if self.deadline is not None:
+                remaining = self.deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                # Wall-clock time so worker processes can share the deadline
+                deadline = time.time() + remaining
+            max_nodes = None
+            if self.max_nodes is not None:
+                max_nodes = max(1, (self.max_nodes - self.nodes) // len(moves))
+
+            first = self.pool.submit(search_root_move_task, board, moves[0], depth, -float('inf'), float('inf'),
+                                     deadline, max_nodes, self.searches)
+            value, pv = self.collect_root_result(first)
+            if value is None:
+                break
+            iteration_best = moves[0]
+            best_value = value
+            best_pv = pv
+
+            futures = [self.pool.submit(search_root_move_task, board, move, depth, best_value, float('inf'),
+                                        deadline, max_nodes, self.searches)
+                       for move in moves[1:]]
+            aborted = False
+            for move, future in zip(moves[1:], futures):
+                value, pv = self.collect_root_result(future)
+                if value is None:
+                    aborted = True
+                    continue
+                if value > best_value:
+                    best_value = value
+                    iteration_best = move
+                    best_pv = pv
+            if aborted:
+                if best_move is None:
+                    best_move = iteration_best
+                break
+            best_move = iteration_best
+            self.store_pv(board, best_pv, depth, best_value)
+            self.completed_depth = depth
+            self.report_iteration(board, depth, best_value, best_move)
+            if self.max_nodes is not None and self.nodes >= self.max_nodes:
+                break
+
+        if best_move is None:
+            best_move = next(iter(board.legal_moves), None)
+        return best_move
+
+    # Adds a search_root_move_task result's counts and selective depth to this search; returns its
+    # score (None if it was aborted) and principal variation
+    def collect_root_result(self, future):
+        value, nodes, qnodes, pv, seldepth = future.result()
+        self.nodes += nodes
+        self.qnodes += qnodes
+        self.stats.seldepth = max(self.stats.seldepth, seldepth)
+        return value, pv
+
+    # The workers search in tables of their own, so the principal variation they found is copied
+    # into this one for principal_variation and ponder. Only the root entry carries a search depth;
+    # the others are move hints at depth 0, which no search takes a cutoff from.
+    def store_pv(self, board, pv, depth, value):
+        board = board.copy(stack=False)
+        for ply, move in enumerate(pv):
+            self.tt.store(chess.polyglot.zobrist_hash(board), depth if ply == 0 else 0, score_to_tt(value, ply), TT_EXACT, move)
             board.push(move)
-            board_value = self.minimax(board, self.depth - 1, -float('inf'), float('inf'), board.turn != self.color)
+            value = -value
+
+    def worker_options(self):
+        return {
+            'depth': self.depth,
+            'hash_mb': self.tt.size * TT_ENTRY_BYTES / (1024 * 1024),
+            'tt_replacement': self.tt.replacement,
+            'move_ordering': self.move_ordering,
+            'evaluator': self.evaluator,
+            'quiescence': self.use_quiescence,
+            'deterministic': self.deterministic,
+            'tablebase': self.tablebase,
+            'pvs': self.pvs,
+            'null_move': self.null_move,
+            'lmr': self.lmr,
+            'check_extensions': self.check_extensions,
+        }
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+            self.stop_event = None
+
+    # Scores are from the side to move's point of view (negamax), in pawns
+    def search_root(self, board, depth, previous_best=None, alpha=-float('inf'), beta=float('inf')):
+        self.root_depth = depth
+        best_move = None
+        best_value = -float('inf')
+
+        moves = self.order_moves(board, board.legal_moves, previous_best, 0)
+
+        for move in moves:
+            # The best root score so far bounds the remaining root moves
+            bound = max(alpha, best_value)
+            self.make_move(board, move)
+            try:
+                if best_move is None or not self.pvs:
+                    value = -self.negamax(board, depth - 1, -beta, -bound)
+                else:
+                    # Principal variation search: prove the move is no better with a null window,
+                    # and only search it properly if that fails
+                    value = -self.negamax(board, depth - 1, -bound - NULL_WINDOW, -bound)
+                    if bound < value < beta:
+                        value = -self.negamax(board, depth - 1, -beta, -bound)
+            finally:
+                self.unmake_move(board)
+
+            if best_move is None or value > best_value:
+                best_value = value
+                best_move = move
+                if depth == 1:
+                    self.root_best = move
+            if best_value >= beta:
+                break
+
+        return best_move, best_value
+
+    def check_limits(self):
+        if self.stop_requested:
+            raise SearchAborted()
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            raise SearchAborted()
+        if self.deadline is not None and self.nodes & 63 == 0 and time.monotonic() >= self.deadline:
+            raise SearchAborted()
+        # Polling the shared event is a system call, so workers look less often
+        if self.stop_event is not None and self.pool is None and self.nodes & 1023 == 0 and self.stop_event.is_set():
+            raise SearchAborted()
+
+    # Keys of the positions since the last capture or pawn move, ending with the root
+    @staticmethod
+    def game_keys(board):
+        board = board.copy()
+        keys = [chess.polyglot.zobrist_hash(board)]
+        for _ in range(min(board.halfmove_clock, len(board.move_stack))):
             board.pop()
-            
-            if self.color == chess.WHITE and board_value > best_value:
-                best_value = board_value
+            keys.append(chess.polyglot.zobrist_hash(board))
+        keys.reverse()
+        return keys
+
+    # A position seen before since the last capture or pawn move, in the game or on the search
+    # path, is scored as a draw; only every other entry can match, and not before four plies
+    def is_repetition(self, key, halfmove_clock):
+        keys = self.key_history
+        for i in range(4, min(halfmove_clock, len(keys)) + 1, 2):
+            if keys[-i] == key:
+                return True
+        return False
+
+    # Evaluation from the side to move's point of view
+    def static_eval(self, board):
+        value = self.evaluator.evaluate(board)
+        return value if board.turn == chess.WHITE else -value
+
+    def negamax(self, board, depth, alpha, beta, allow_null=True):
+        if depth <= 0 and self.use_quiescence:
+            return self.quiescence(board, alpha, beta)
+        self.nodes += 1
+        self.check_limits()
+        # Draws come from the bitboards, the move counter and the key history; mate and
+        # stalemate from the move list below, so no extra move generation is needed
+        key = chess.polyglot.zobrist_hash(board)
+        if insufficient_material(board) or self.is_repetition(key, board.halfmove_clock):
+            return 0
+        if board.halfmove_clock >= 100 and (not board.is_check() or any(board.generate_legal_moves())):
+            return 0
+        if depth <= 0:
+            return self.static_eval(board)
+
+        ply = len(board.move_stack) - self.root_ply
+        if self.tablebase is not None:
+            wdl = self.tablebase.probe_wdl(board)
+            if wdl is not None:
+                self.tbhits += 1
+                # Cursed wins and blessed losses are draws under the 50-move rule
+                return 0 if abs(wdl) < 2 else (TABLEBASE_WIN - ply) * (1 if wdl > 0 else -1)
+
+        tt_move = None
+        entry = self.tt.probe(key)
+        if entry is not None:
+            _, tt_depth, tt_value, tt_flag, tt_move, _ = entry
+            tt_value = score_from_tt(tt_value, ply)
+            if tt_depth >= depth:
+                if tt_flag == TT_EXACT:
+                    return tt_value
+                if tt_flag == TT_LOWER:
+                    alpha = max(alpha, tt_value)
+                elif tt_flag == TT_UPPER:
+                    beta = min(beta, tt_value)
+                if beta <= alpha:
+                    return tt_value
+        alpha_orig = alpha
+
+        if ply > self.stats.seldepth:
+            self.stats.seldepth = ply
+        in_check = board.is_check()
+
+        # Null move: if passing still fails high, a real move will too. Not in check, not twice
+        # in a row, and not with only pawns left, where zugzwang is common; deep cutoffs are
+        # verified with a reduced search that cannot pass.
+        if (self.null_move and allow_null and not in_check and depth >= NULL_MOVE_MIN_DEPTH and beta < float('inf')
+                and board.occupied_co[board.turn] & ~(board.pawns | board.kings) and self.static_eval(board) >= beta):
+            reduction = NULL_MOVE_REDUCTION + (1 if depth >= NULL_MOVE_VERIFY_DEPTH else 0)
+            self.make_move(board, chess.Move.null())
+            # Repetitions may not reach back across the null move
+            board.halfmove_clock = 0
+            try:
+                value = -self.negamax(board, depth - 1 - reduction, -beta, -beta + NULL_WINDOW, False)
+            finally:
+                self.unmake_move(board)
+            if value >= beta:
+                if depth < NULL_MOVE_VERIFY_DEPTH:
+                    return beta
+                if self.negamax(board, depth - 1 - reduction, beta - NULL_WINDOW, beta, False) >= beta:
+                    return beta
+
+        # Check extension, capped so perpetual checks cannot extend forever
+        new_depth = depth - 1
+        if self.check_extensions and in_check and ply < 2 * self.root_depth:
+            new_depth += 1
+
+        moves = self.order_moves(board, board.legal_moves, tt_move, ply)
+        if not moves:
+            return -(MATE_SCORE - ply) if in_check else 0
+
+        self.key_history.append(key)
+        best_move = None
+        best_value = -float('inf')
+        for i, move in enumerate(moves):
+            reduction = 0
+            if (self.lmr and i >= LMR_MIN_MOVES and depth >= LMR_MIN_DEPTH and not in_check and not move.promotion
+                    and not board.is_capture(move) and not board.gives_check(move)):
+                reduction = 2 if i >= LMR_LATE_MOVES else 1
+            self.make_move(board, move)
+            try:
+                if i == 0:
+                    value = -self.negamax(board, new_depth, -beta, -alpha)
+                else:
+                    value = None
+                    if reduction:
+                        # Late quiet moves are searched shallower first; a fail high earns the full depth
+                        value = -self.negamax(board, new_depth - reduction, -alpha - NULL_WINDOW, -alpha)
+                        if value > alpha:
+                            value = None
+                    if value is None and self.pvs:
+                        value = -self.negamax(board, new_depth, -alpha - NULL_WINDOW, -alpha)
+                        if alpha < value < beta:
+                            value = -self.negamax(board, new_depth, -beta, -alpha)
+                    elif value is None:
+                        value = -self.negamax(board, new_depth, -beta, -alpha)
+            finally:
+                self.unmake_move(board)
+            if value > best_value:
+                best_value = value
                 best_move = move
-            elif self.color == chess.BLACK and board_value < best_value:
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                self.record_cutoff(board, move, i == 0, depth, ply)
+                break
+
+        if best_value <= alpha_orig:
+            flag = TT_UPPER
+        elif best_value >= beta:
+            flag = TT_LOWER
+        else:
+            flag = TT_EXACT
+        self.key_history.pop()
+        self.tt.store(key, depth, score_to_tt(best_value, ply), flag, best_move)
+        return best_value
+
+    # Resolve captures and promotions past the horizon so leaves are not scored mid-exchange.
+    # qnodes counts these nodes separately; they are also included in self.nodes.
+    def quiescence(self, board, alpha, beta):
+        self.nodes += 1
+        self.qnodes += 1
+        self.check_limits()
+
+        stand_pat = self.static_eval(board)
+        if stand_pat >= beta:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+
+        best = stand_pat
+        ply = len(board.move_stack) - self.root_ply
+        if ply > self.stats.seldepth:
+            self.stats.seldepth = ply
+        for move in self.order_moves(board, self.noisy_moves(board), None, ply):
+            # Delta pruning: skip captures that cannot bring the score back inside the window
+            if stand_pat + self.capture_gain(board, move) + DELTA_MARGIN <= alpha:
+                continue
+            self.make_move(board, move)
+            try:
+                value = -self.quiescence(board, -beta, -alpha)
+            finally:
+                self.unmake_move(board)
+            best = max(best, value)
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+        return best
+
+    @staticmethod
+    def noisy_moves(board):
+        moves = list(board.generate_legal_captures())
+        promoting = board.pawns & board.occupied_co[board.turn] & (chess.BB_RANK_7 if board.turn == chess.WHITE else chess.BB_RANK_2)
+        if promoting:
+            moves.extend(board.generate_legal_moves(promoting, chess.BB_ALL & ~board.occupied))
+        return moves
+
+    @staticmethod
+    def capture_gain(board, move):
+        if board.is_en_passant(move):
+            gain = MATERIAL_VALUES[chess.PAWN]
+        else:
+            victim = board.piece_type_at(move.to_square)
+            gain = MATERIAL_VALUES[victim] if victim else 0
+        if move.promotion:
+            gain += MATERIAL_VALUES[move.promotion] - MATERIAL_VALUES[chess.PAWN]
+        return gain
+
+    def make_move(self, board, move):
+        self.evaluator.push(board, move)
+        board.push(move)
+
+    def unmake_move(self, board):
+        board.pop()
+        self.evaluator.pop()
+
+    def order_moves(self, board, moves, pv_move, ply):
+        if not self.move_ordering:
+            return list(moves)
+        killers = self.killers[ply] if ply < MAX_PLY else (None, None)
+        history = self.history[board.turn]
+        if ply == 0 and self.deterministic:
+            # The parallel root has no history of its own, so neither may the serial one
+            history = ZERO_HISTORY
+
+        def score(move):
+            if move == pv_move:
+                return ORDER_PV
+            if board.is_capture(move):
+                victim = chess.PAWN if board.is_en_passant(move) else board.piece_type_at(move.to_square)
+                attacker = board.piece_type_at(move.from_square)
+                return ORDER_CAPTURE + victim * 10 - attacker
+            if move.promotion:
+                return ORDER_PROMOTION + move.promotion
+            if move == killers[0]:
+                return ORDER_KILLER + 1
+            if move == killers[1]:
+                return ORDER_KILLER
+            return history[move.from_square * 64 + move.to_square]
+
+        return sorted(moves, key=score, reverse=True)
+
+    def record_cutoff(self, board, move, first, depth, ply):
+        self.stats.cutoffs += 1
+        if first:
+            self.stats.first_move_cutoffs += 1
+        # Only quiet moves feed killers and history; captures are already ordered first
+        if not self.move_ordering or move.promotion or board.is_capture(move):
+            return
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        history = self.history[board.turn]
+        index = move.from_square * 64 + move.to_square
+        history[index] += depth * depth
+        if history[index] > HISTORY_MAX:
+            for i in range(4096):
+                history[i] >>= 1
+
+    # Full material recount; the search itself uses self.evaluator
+    @staticmethod
+    def evaluate_board(board):
+        evaluation = 0
+        for piece_type in MATERIAL_VALUES:
+            evaluation += len(board.pieces(piece_type, chess.WHITE)) * MATERIAL_VALUES[piece_type]
+            evaluation -= len(board.pieces(piece_type, chess.BLACK)) * MATERIAL_VALUES[piece_type]
+        return evaluation
+
+# Material values for 12D pieces, matching MATERIAL_VALUES for the 2D search
+PIECE_VALUES_12D = {Pawn: 1, Knight: 3, Bishop: 3, Rook: 5, Queen: 9, King: 0}
+
+# Scores above this are mates; the search subtracts the ply so shorter mates score higher
+MATE_SCORE_12D = 100000
+
+class MaterialEvaluator12D:
+    def evaluate(self, board):
+        evaluation = 0
+        for piece in board.squares.values():
+            value = PIECE_VALUES_12D[type(piece)]
+            evaluation += value if piece.color == 'White' else -value
+        return evaluation
+
+# Alpha-beta searcher for Board12D positions, mirroring AIPlayer: iterative deepening under a
+# chess.engine.Limit, searching in place with push/pop. Any object with evaluate(board)
+# returning a White-positive score can replace the evaluator.
+class AIPlayer12D:
+    def __init__(self, color, depth=2, evaluator=None):
+        self.color = color
+        self.depth = depth
+        self.evaluator = evaluator or MaterialEvaluator12D()
+        self.nodes = 0
+        self.max_nodes = None
+        self.deadline = None
+        self.completed_depth = 0
+        self.elapsed = 0.0
+        self.stop_requested = False
+
+    def get_best_move(self, board, limit=None):
+        if limit is None or (limit.time is None and limit.depth is None and limit.nodes is None):
+            limit = chess.engine.Limit(depth=self.depth)
+        start = time.monotonic()
+        self.nodes = 0
+        self.max_nodes = limit.nodes
+        self.deadline = start + limit.time if limit.time is not None else None
+        self.completed_depth = 0
+        self.root_ply = len(board.move_stack)
+        max_depth = limit.depth if limit.depth is not None else MAX_SEARCH_DEPTH
+
+        moves = board.legal_moves()
+        best_move = moves[0] if moves else None
+        try:
+            for depth in range(1, max_depth + 1):
+                try:
+                    best_move, best_value = self.search_root(board, moves, depth, best_move)
+                except SearchAborted:
+                    break
+                self.completed_depth = depth
+                if abs(best_value) >= MATE_SCORE_12D - MAX_PLY:
+                    break
+                if self.deadline is not None and time.monotonic() >= self.deadline:
+                    break
+        finally:
+            self.stop_requested = False
+            self.elapsed = time.monotonic() - start
+        return best_move
+
+    def stop(self):
+        self.stop_requested = True
+
+    def nps(self):
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def search_root(self, board, moves, depth, previous_best=None):
+        is_maximizing = board.turn == 'White'
+        best_move = None
+        best_value = -float('inf') if is_maximizing else float('inf')
+        if previous_best in moves:
+            moves = [previous_best] + [move for move in moves if move != previous_best]
+
+        for move in moves:
+            alpha = best_value if is_maximizing and best_move is not None else -float('inf')
+            beta = best_value if not is_maximizing and best_move is not None else float('inf')
+            board.push_move(move)
+            try:
+                board_value = self.minimax(board, depth - 1, alpha, beta, not is_maximizing)
+            finally:
+                board.pop()
+            if best_move is None or (is_maximizing and board_value > best_value) or (not is_maximizing and board_value < best_value):
                 best_value = board_value
                 best_move = move
-        
-        return best_move
+        return best_move, best_value
+
+    def check_limits(self):
+        if self.stop_requested:
+            raise SearchAborted()
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            raise SearchAborted()
+        if self.deadline is not None and self.nodes & 63 == 0 and time.monotonic() >= self.deadline:
+            raise SearchAborted()
 
     def minimax(self, board, depth, alpha, beta, is_maximizing):
-        if depth == 0 or board.is_game_over():
-            return self.evaluate_board(board)
-        
-        if is_maximizing:
-            max_eval = -float('inf')
-            for move in board.legal_moves:
-                board.push(move)
-                eval = self.minimax(board, depth - 1, alpha, beta, False)
+        self.nodes += 1
+        self.check_limits()
+        if depth == 0:
+            return self.evaluator.evaluate(board)
+
+        color = board.turn
+        best = -float('inf') if is_maximizing else float('inf')
+        legal = 0
+        # Pseudo-legal moves are checked for self-check lazily, so a cutoff skips the rest
+        for move in self.order_moves(board, board.pseudo_legal_moves()):
+            board.push_move(move)
+            try:
+                if board.is_in_check(color):
+                    continue
+                legal += 1
+                eval = self.minimax(board, depth - 1, alpha, beta, not is_maximizing)
+            finally:
                 board.pop()
-                max_eval = max(max_eval, eval)
+            if is_maximizing:
+                best = max(best, eval)
                 alpha = max(alpha, eval)
-                if beta <= alpha:
-                    break
-            return max_eval
-        else:
-            min_eval = float('inf')
-            for move in board.legal_moves:
-                board.push(move)
-                eval = self.minimax(board, depth - 1, alpha, beta, True)
-                board.pop()
-                min_eval = min(min_eval, eval)
+            else:
+                best = min(best, eval)
                 beta = min(beta, eval)
-                if beta <= alpha:
+            if beta <= alpha:
+                break
+
+        if legal == 0:
+            if board.is_in_check(color):
+                ply = len(board.move_stack) - self.root_ply
+                return -(MATE_SCORE_12D - ply) if is_maximizing else MATE_SCORE_12D - ply
+            return 0
+        return best
+
+    @staticmethod
+    def order_moves(board, moves):
+        # Captures first, most valuable victim first; quiet moves keep generator order
+        squares = board.squares
+
+        def score(move):
+            victim = squares.get(move[1])
+            return PIECE_VALUES_12D[type(victim)] + 1 if victim is not None and len(move) == 2 else 0
+
+        return sorted(moves, key=score, reverse=True)
+
+# Fixed-depth AIPlayer12D searches on the standard layout and random dense layouts
+def benchmark_board12d_search(layouts=3, depth=2, num_pieces=40, free_axes=3):
+    boards = [standard_board12d()]
+    for seed in range(layouts):
+        board = Board12D()
+        for position, piece in random_board12d_layout(num_pieces, seed, free_axes).items():
+            board.place_piece(piece, position)
+        # Random layouts can leave the side to move already mated
+        if board.legal_moves():
+            boards.append(board)
+    total_nodes = 0
+    total_time = 0.0
+    for i, board in enumerate(boards):
+        player = AIPlayer12D(board.turn)
+        player.get_best_move(board, chess.engine.Limit(depth=depth))
+        total_nodes += player.nodes
+        total_time += player.elapsed
+        print(f"{'standard' if i == 0 else f'random {i}':10} depth {player.completed_depth}  nodes {player.nodes:8}  "
+              f"{player.elapsed:7.2f}s  {player.nps():10,.0f} nps")
+    print(f"{'total':10} {total_nodes / total_time:,.0f} nps")
+
+# Lets two AIPlayer12D play a Board12D position and reports search speed per move
+def play_board12d_game(board=None, limit=None, max_plies=40, watch=True):
+    board = board or standard_board12d()
+    limit = limit or chess.engine.Limit(time=1.0)
+    players = {'White': AIPlayer12D('White'), 'Black': AIPlayer12D('Black')}
+    for _ in range(max_plies):
+        player = players[board.turn]
+        move = player.get_best_move(board, limit)
+        if move is None:
+            if board.is_in_check(board.turn):
+                print(f"Checkmate! {'Black' if board.turn == 'White' else 'White'} wins!")
+            else:
+                print("Stalemate!")
+            return board
+        mover = board.turn
+        board.push_move(move)
+        if watch:
+            print(f"{mover}: {board.describe_move(move)}  depth {player.completed_depth}  "
+                  f"nodes {player.nodes}  {player.nps():,.0f} nps")
+            board.print_board()
+    return board
+
+# Batched Board12D positions for NumPy, kept sparse: row i of `cells` holds the occupied cells of
+# position i in increasing order and the same row of `codes` their signed piece codes (White
+# positive, Black negative), both padded with zeros up to the largest piece count. A position is
+# then a few dozen entries instead of BOARD_CELLS, and the code on any cell is a binary search
+# away (batch_occupancy). batch_dense_codes and batch_piece_planes build the full per-cell arrays
+# only on request. Sides are 1 for White and -1 for Black. Castling is not generated by the
+# batched functions.
+PIECE_CODES = {King: 1, Queen: 2, Rook: 3, Bishop: 4, Knight: 5, Pawn: 6}
+COLOR_SIGNS = {'White': 1, 'Black': -1}
+
+def board12d_to_arrays(boards):
+    if np is None:
+        raise ImportError("The batched Board12D functions need NumPy")
+    width = max([len(board.squares) for board in boards] + [1])
+    cells = np.zeros((len(boards), width), dtype=np.intp)
+    codes = np.zeros((len(boards), width), dtype=np.int8)
+    sides = np.empty(len(boards), dtype=np.int8)
+    for row, board in enumerate(boards):
+        for slot, index in enumerate(sorted(board.squares)):
+            piece = board.squares[index]
+            cells[row, slot] = index
+            codes[row, slot] = PIECE_CODES[type(piece)] * COLOR_SIGNS[piece.color]
+        sides[row] = COLOR_SIGNS[board.turn]
+    return cells, codes, sides
+
+# (N, BOARD_CELLS) int8 codes of every cell, 0 where empty
+def batch_dense_codes(cells, codes):
+    dense = np.zeros((len(codes), BOARD_CELLS), dtype=np.int8)
+    rows, slots = np.nonzero(codes)
+    dense[rows, cells[rows, slots]] = codes[rows, slots]
+    return dense
+
+# (N, 12, BOARD_CELLS) booleans: White King, Queen, Rook, Bishop, Knight, Pawn, then Black
+def batch_piece_planes(cells, codes):
+    planes = np.zeros((len(codes), 12, BOARD_CELLS), dtype=bool)
+    rows, slots = np.nonzero(codes)
+    piece_codes = codes[rows, slots].astype(np.intp)
+    planes[rows, np.where(piece_codes > 0, piece_codes - 1, 5 - piece_codes), cells[rows, slots]] = True
+    return planes
+
+# MaterialEvaluator12D.evaluate for every row
+def batch_material(codes):
+    values = np.zeros(13)
+    for piece_class, code in PIECE_CODES.items():
+        values[6 + code] = PIECE_VALUES_12D[piece_class]
+        values[6 - code] = -PIECE_VALUES_12D[piece_class]
+    return values[codes.astype(np.intp) + 6].sum(axis=1)
+
+# The pieces of a batch as sorted row * BOARD_CELLS + cell keys and their codes
+def batch_occupancy(cells, codes):
+    rows, slots = np.nonzero(codes)
+    keys = rows * BOARD_CELLS + cells[rows, slots]
+    order = np.argsort(keys, kind='stable')
+    return keys[order], codes[rows, slots][order]
+
+# The codes on (rows, squares), any matching shapes, 0 where empty
+def batch_codes_at(occupancy, rows, squares):
+    keys, key_codes = occupancy
+    queries = rows * BOARD_CELLS + squares
+    if not len(keys):
+        return np.zeros(queries.shape, dtype=np.int8)
+    found = np.minimum(np.searchsorted(keys, queries), len(keys) - 1)
+    return np.where(keys[found] == queries, key_codes[found], 0).astype(np.int8)
+
+# A move table as arrays, one column per target: the one or two axes it steps along, how far,
+# and for sliding moves the previous cell of the same ray. Targets of many squares at once are
+# then a few array expressions instead of a walk over coordinate tuples.
+class OffsetTable:
+    def __init__(self, offsets, max_distance=1):
+        rows = []
+        for offset in offsets:
+            (axis_a, step_a), (axis_b, step_b) = offset if len(offset) == 2 else (offset[0], (offset[0][0], 0))
+            limit = min(max_distance, BOARD_SHAPE[axis_a] - 1, BOARD_SHAPE[axis_b] - 1)
+            prev = -1
+            for distance in range(1, limit + 1):
+                rows.append((axis_a, step_a * distance, axis_b, step_b * distance, distance, prev))
+                prev = len(rows) - 1
+        self.axis_a, self.step_a, self.axis_b, self.step_b, self.distance, self.prev = np.array(rows).T
+        shape = np.array(BOARD_SHAPE)
+        strides = np.array(BOARD_STRIDES)
+        self.size_a, self.size_b = shape[self.axis_a], shape[self.axis_b]
+        self.stride_a, self.stride_b = strides[self.axis_a], strides[self.axis_b]
+        self.delta = self.step_a * self.stride_a + self.step_b * self.stride_b
+        self.chain = [(columns, self.prev[columns]) for columns in
+                      (np.flatnonzero(self.distance == distance) for distance in range(2, self.distance.max() + 1))]
+
+    # (M, C) target cells of M squares, and whether each is on the board (off-board targets are 0)
+    def targets(self, squares):
+        coordinates = batch_coordinates(squares)
+        a = coordinates[:, self.axis_a] + self.step_a
+        b = coordinates[:, self.axis_b] + self.step_b
+        valid = (a >= 0) & (a < self.size_a) & (b >= 0) & (b < self.size_b)
+        return np.where(valid, squares[:, None] + self.delta, 0), valid
+
+    # Sliding moves reach a target when every earlier cell of its ray is empty
+    def reach(self, valid, target_codes):
+        reached = valid.copy()
+        for columns, prev in self.chain:
+            reached[:, columns] &= reached[:, prev] & (target_codes[:, prev] == 0)
+        return reached
+
+# decode_position for an array of cells, as (M, BOARD_DIMENSIONS) coordinates
+def batch_coordinates(squares):
+    return squares[:, None] // np.array(BOARD_STRIDES) % np.array(BOARD_SHAPE)
+
+# (row, cell, code) of every piece of the given sides (one per row), in row order
+def batch_pieces(cells, codes, sides):
+    rows, slots = np.nonzero(codes * sides[:, None] > 0)
+    return rows, cells[rows, slots], codes[rows, slots]
+
+# The king cell of the given side in every row, -1 where there is none
+def batch_kings(cells, codes, sides):
+    kings = np.full(len(codes), -1)
+    rows, squares, piece_codes = batch_pieces(cells, codes, sides)
+    pick = np.abs(piece_codes) == PIECE_CODES[King]
+    kings[rows[pick]] = squares[pick]
+    return kings
+
+# Built on first use, so importing the engine does not need NumPy
+BATCH_TABLES = {}
+
+def batch_tables():
+    if not BATCH_TABLES:
+        longest = max(BOARD_SHAPE) - 1
+        BATCH_TABLES.update({
+            Rook: OffsetTable(ROOK_DIRECTIONS, longest),
+            Bishop: OffsetTable(BISHOP_DIRECTIONS, longest),
+            Knight: OffsetTable(KNIGHT_OFFSETS),
+            King: OffsetTable(KING_OFFSETS),
+        })
+        for sign in COLOR_SIGNS.values():
+            BATCH_TABLES[('push', sign)] = OffsetTable([((0, sign),)], 2)
+            BATCH_TABLES[('capture', sign)] = OffsetTable([((0, sign), (i, step)) for i in range(1, BOARD_DIMENSIONS) for step in (1, -1)])
+    return BATCH_TABLES
+
+# Tables each piece moves by; queens use both sliders
+BATCH_MOVE_TABLES = {King: (King,), Queen: (Rook, Bishop), Rook: (Rook,), Bishop: (Bishop,), Knight: (Knight,)}
+
+# (row, from, to) for every piece of the given sides (1, -1, or one per row). With attacks=False
+# these are the pseudo-legal moves of Board12D.pseudo_legal_moves; with attacks=True they are the
+# attacked cells instead: blockers of either color count, and pawns attack diagonally only.
+# piece_classes limits the pieces looked at.
+def batch_targets(cells, codes, sides, attacks=False, piece_classes=PIECE_CLASSES):
+    tables = batch_tables()
+    sides = np.broadcast_to(np.asarray(sides, dtype=np.int8), (len(codes),))
+    occupancy = batch_occupancy(cells, codes)
+    rows, squares, kinds = batch_pieces(cells, codes, sides)
+    kinds = np.abs(kinds)
+    signs = sides[rows]
+    found = []
+
+    def add(pick, table, pawn=None):
+        r, s, sign = rows[pick], squares[pick], signs[pick][:, None]
+        targets, valid = table.targets(s)
+        target_codes = batch_codes_at(occupancy, r[:, None], targets)
+        if pawn == 'push':
+            # The double push only exists from the starting rank and, like a single push, needs empty cells
+            start = 1 if table.step_a[0] > 0 else BOARD_SHAPE[0] - 2
+            valid &= (table.distance == 1) | (s // BOARD_STRIDES[0] == start)[:, None]
+            valid = table.reach(valid, target_codes) & (target_codes == 0)
+        elif table.distance.max() > 1:
+            valid = table.reach(valid, target_codes)
+        if pawn == 'capture' and not attacks:
+            valid &= target_codes * sign < 0
+        elif pawn is None and not attacks:
+            valid &= target_codes * sign <= 0
+        i, j = np.nonzero(valid)
+        found.append((r[i], s[i], targets[i, j]))
+
+    for piece_class, table_keys in BATCH_MOVE_TABLES.items():
+        pick = kinds == PIECE_CODES[piece_class]
+        if piece_class in piece_classes and pick.any():
+            for key in table_keys:
+                add(pick, tables[key])
+    for sign in (1, -1):
+        pick = (kinds == PIECE_CODES[Pawn]) & (signs == sign)
+        if Pawn in piece_classes and pick.any():
+            if not attacks:
+                add(pick, tables[('push', sign)], 'push')
+            add(pick, tables[('capture', sign)], 'capture')
+    if not found:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty, empty
+    rows, squares, targets = (np.concatenate(part) for part in zip(*found))
+    order = np.argsort(rows, kind='stable')
+    return rows[order], squares[order], targets[order]
+
+def batch_pseudo_moves(cells, codes, sides):
+    return batch_targets(cells, codes, sides)
+
+# Counts of the pieces of side `side` attacking each attacked cell, whatever stands on it, as
+# (row, cell, count) sorted by row and cell; computed chunk rows at a time to bound the size of
+# the intermediate arrays. Cells missing from the result are not attacked.
+def batch_attack_counts(cells, codes, side, chunk=256):
+    found = []
+    for start in range(0, len(codes), chunk):
+        rows, _, targets = batch_targets(cells[start:start + chunk], codes[start:start + chunk], side, attacks=True)
+        keys, counts = np.unique((rows + start) * BOARD_CELLS + targets, return_counts=True)
+        found.append((keys // BOARD_CELLS, keys % BOARD_CELLS, counts))
+    if not found:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty, empty
+    return tuple(np.concatenate(part) for part in zip(*found))
+
+# Whether pieces with the given codes attack a square from `offsets`, their coordinates minus the
+# square's along the last axis, when nothing stands in between
+def batch_piece_attacks(piece_codes, offsets):
+    distances = np.abs(offsets)
+    size = distances.sum(axis=-1)
+    axes = np.count_nonzero(offsets, axis=-1)
+    longest = distances.max(axis=-1)
+    kinds = np.abs(piece_codes)
+    straight = axes == 1
+    diagonal = (axes == 2) & (2 * longest == size)
+    return (((kinds == PIECE_CODES[Knight]) & (axes == 2) & (size == 3) & (longest == 2))
+            | ((kinds == PIECE_CODES[King]) & (size == 1))
+            | ((kinds == PIECE_CODES[Pawn]) & diagonal & (size == 2) & (offsets[..., 0] == -np.sign(piece_codes)))
+            | (((kinds == PIECE_CODES[Rook]) | (kinds == PIECE_CODES[Queen])) & straight)
+            | (((kinds == PIECE_CODES[Bishop]) | (kinds == PIECE_CODES[Queen])) & diagonal))
+
+# Board12D.is_square_attacked for one square per query (row, square), by side `side`, on the
+# board where the piece on `vacated` has moved to `moved` as `moved_code` (use -1 for no move).
+# Rather than tracing every ray out of the square, each piece of the attacking side is tested
+# against it: by its offset, and for sliders also by no other piece standing between the two.
+# That is a few dozen pieces per query instead of hundreds of ray cells; queries go chunk at a time.
+def batch_square_attacked(cells, codes, rows, squares, side, vacated, moved, moved_code, chunk=4096):
+    strides = np.array(BOARD_STRIDES)
+    shape = np.array(BOARD_SHAPE)
+    coordinates = (cells[:, :, None] // strides % shape).astype(np.int8)
+    square_coordinates = (squares[:, None] // strides % shape).astype(np.int8)
+    moved_coordinates = (np.maximum(moved, 0)[:, None] // strides % shape).astype(np.int8)
+    attacked = np.zeros(len(rows), dtype=bool)
+    for start in range(0, len(rows), chunk):
+        part = slice(start, start + chunk)
+        r, vacated_part, moved_part = rows[part], vacated[part, None], moved[part, None]
+        # The mover leaves `vacated` and replaces whatever stood on `moved`, in an extra slot
+        piece_codes = np.concatenate([np.where((cells[r] == vacated_part) | (cells[r] == moved_part), 0, codes[r]),
+                                      np.where(moved_part >= 0, moved_code[part, None], 0)], axis=1)
+        piece_cells = np.concatenate([cells[r], np.maximum(moved_part, 0)], axis=1)
+        offsets = np.concatenate([coordinates[r], moved_coordinates[part, None]], axis=1) - square_coordinates[part, None]
+        queries, slots = np.nonzero(piece_codes * side > 0)
+        attacker_codes = piece_codes[queries, slots]
+        attacker_offsets = offsets[queries, slots]
+        hits = batch_piece_attacks(attacker_codes, attacker_offsets)
+        # A slider further than one step away is blocked by any piece on the line before it, which
+        # lies a whole number of steps of the line's cell delta from the square
+        reach = np.abs(attacker_offsets).max(axis=-1)
+        sliding = np.flatnonzero(hits & (reach > 1) & (np.abs(attacker_codes) != PIECE_CODES[Knight]))
+        if len(sliding):
+            lines = queries[sliding]
+            step = (attacker_offsets[sliding] // reach[sliding, None]).astype(np.intp) @ strides
+            distances = piece_cells[lines] - squares[part][lines, None]
+            steps = distances // step[:, None]
+            between = (steps * step[:, None] == distances) & (steps > 0) & (steps < reach[sliding, None]) & (piece_codes[lines] != 0)
+            hits[sliding[between.any(axis=1)]] = False
+        attacked[start + queries[hits]] = True
+    return attacked
+
+# Board12D.is_in_check for the given sides (one per row)
+def batch_in_check(cells, codes, sides):
+    sides = np.broadcast_to(np.asarray(sides, dtype=np.int8), (len(codes),))
+    in_check = np.zeros(len(codes), dtype=bool)
+    kings = batch_kings(cells, codes, sides)
+    for sign in (1, -1):
+        rows = np.flatnonzero((sides == sign) & (kings >= 0))
+        none = np.full(len(rows), -1)
+        in_check[rows] = batch_square_attacked(cells, codes, rows, kings[rows], -sign, none, none, none)
+    return in_check
+
+# Pseudo-legal moves of the side to move as (row, from, to) and a mask of the legal ones, which
+# do not leave the mover's king attacked; Board12D.legal_moves without castling
+def batch_legal_moves(cells, codes, sides):
+    rows, from_squares, to_squares = batch_pseudo_moves(cells, codes, sides)
+    king_squares = batch_kings(cells, codes, sides)
+    moving = batch_codes_at(batch_occupancy(cells, codes), rows, from_squares)
+    king_moves = np.abs(moving) == PIECE_CODES[King]
+    kings = np.where(king_moves, to_squares, king_squares[rows])
+    # Other moves can only expose the king when it is already in check or when the piece leaves
+    # a line through the king (one axis, or two axes by the same distance)
+    offsets = np.abs(batch_coordinates(from_squares) - batch_coordinates(kings))
+    axes = np.count_nonzero(offsets, axis=1)
+    on_line = (axes == 1) | ((axes == 2) & (2 * offsets.max(axis=1) == offsets.sum(axis=1)))
+    exposed = king_moves | on_line | batch_in_check(cells, codes, sides)[rows]
+    legal = np.ones(len(rows), dtype=bool)
+    for sign in (1, -1):
+        pick = np.flatnonzero((sides[rows] == sign) & (kings >= 0) & exposed)
+        legal[pick] = ~batch_square_attacked(cells, codes, rows[pick], kings[pick], -sign, from_squares[pick],
+                                            to_squares[pick], moving[pick])
+    return rows, from_squares, to_squares, legal
+
+# Randomized cross-check of the batched functions against Board12D on random layouts of every
+# density, also timing both. Attack counts are compared exactly on cells holding an enemy of the
+# attacker (where they equal the number of valid moves onto the cell) and as attacked or not on
+# every other occupied cell and a sample of empty ones.
+def verify_board12d_batch(positions=200, seed=0):
+    rng = random.Random(seed)
+    boards = []
+    for i in range(positions):
+        board = Board12D()
+        layout = random_board12d_layout(rng.randrange(2, 48), seed * positions + i, rng.choice((2, 3, 4, BOARD_DIMENSIONS)))
+        for position, piece in layout.items():
+            board.place_piece(piece, position)
+        board.turn = rng.choice(('White', 'Black'))
+        boards.append(board)
+
+    # Fill the lazily built move tables of both first so only steady-state work is timed
+    batch_tables()
+    for board in boards:
+        board.legal_moves()
+
+    start = time.perf_counter()
+    cells, codes, sides = board12d_to_arrays(boards)
+    rows, from_squares, to_squares, legal = batch_legal_moves(cells, codes, sides)
+    in_check = {sign: batch_in_check(cells, codes, sign) for sign in (1, -1)}
+    attack_counts = {sign: batch_attack_counts(cells, codes, sign) for sign in (1, -1)}
+    material = batch_material(codes)
+    batch_time = time.perf_counter() - start
+    attack_maps = {sign: collections.defaultdict(dict) for sign in attack_counts}
+    for sign, counts in attack_counts.items():
+        for row, cell, count in zip(*(part.tolist() for part in counts)):
+            attack_maps[sign][row][cell] = count
+    dense = batch_dense_codes(cells[:8], codes[:8])
+    planes = batch_piece_planes(cells[:8], codes[:8])
+
+    start = time.perf_counter()
+    evaluator = MaterialEvaluator12D()
+    for board in boards:
+        board.legal_moves()
+        board.is_in_check('White')
+        board.is_in_check('Black')
+        evaluator.evaluate(board)
+    scalar_time = time.perf_counter() - start
+
+    mismatches = []
+    bounds = np.searchsorted(rows, np.arange(positions + 1))
+    for i, board in enumerate(boards):
+        part = slice(bounds[i], bounds[i + 1])
+        pseudo = set(zip(from_squares[part].tolist(), to_squares[part].tolist()))
+        legal_moves = set(zip(from_squares[part][legal[part]].tolist(), to_squares[part][legal[part]].tolist()))
+        if pseudo != set(board.pseudo_legal_moves()):
+            mismatches.append((i, "pseudo-legal moves"))
+        if legal_moves != {move for move in board.legal_moves() if len(move) == 2}:
+            mismatches.append((i, "legal moves"))
+        if material[i] != evaluator.evaluate(board):
+            mismatches.append((i, "material"))
+        if i < len(dense):
+            expected = {index: PIECE_CODES[type(piece)] * COLOR_SIGNS[piece.color] for index, piece in board.squares.items()}
+            if {int(index): int(dense[i, index]) for index in np.flatnonzero(dense[i])} != expected:
+                mismatches.append((i, "dense codes"))
+            if {int(cell): int(plane) + 1 if plane < 6 else 5 - int(plane) for plane, cell in np.argwhere(planes[i])} != expected:
+                mismatches.append((i, "piece planes"))
+        for color, sign in COLOR_SIGNS.items():
+            if in_check[sign][i] != board.is_in_check(color):
+                mismatches.append((i, f"{color} in check"))
+            attacker = 'Black' if color == 'White' else 'White'
+            moves_onto = collections.Counter(target for index, piece in board.squares.items() if piece.color == attacker
+                                             for target in piece.target_indices(index, board))
+            counts = attack_maps[-sign][i]
+            samples = list(board.squares) + [rng.randrange(BOARD_CELLS) for _ in range(32)]
+            for index in samples:
+                piece = board.squares.get(index)
+                if piece is not None and piece.color == color:
+                    agree = counts.get(index, 0) == moves_onto[index]
+                else:
+                    agree = bool(counts.get(index, 0)) == board.is_square_attacked(index, attacker)
+                if not agree:
+                    mismatches.append((i, f"{attacker} attacks on {BOARD_POSITIONS[index]}"))
                     break
-            return min_eval
-
-    def evaluate_board(self, board):
-        material_values = {
-            chess.PAWN: 1,
-            chess.KNIGHT: 3,
-            chess.BISHOP: 3,
-            chess.ROOK: 5,
-            chess.QUEEN: 9,
-            chess.KING: 0
-        }
-        evaluation = 0
-        for piece_type in material_values:
-            evaluation += len(board.pieces(piece_type, chess.WHITE)) * material_values[piece_type]
-            evaluation -= len(board.pieces(piece_type, chess.BLACK)) * material_values[piece_type]
-        return evaluation
 
-def randomize_opening_moves(board, num_moves=2):
-    openings = [
-        ["e2e4", "e7e5", "g1f3", "b8c6"],  # King's Pawn Opening
-        ["d2d4", "d7d5", "c2c4", "e7e6"],  # Queen's Gambit
-        ["c2c4", "e7e5", "g1f3", "b8c6"],  # English Opening
-        ["g1f3", "d7d5", "g2g3", "c8f5"],  # Reti Opening
-        ["e2e4", "c7c5", "g1f3", "d7d6"],  # Sicilian Defense
-        ["e2e4", "e7e6", "d2d4", "d7d5"],  # French Defense
-        ["e2e4", "c7c6", "d2d4", "d7d5"],  # Caro-Kann Defense
-        ["e2e4", "e7e5", "f2f4", "e5f4"],  # King's Gambit
-        ["d2d4", "g8f6", "c2c4", "e7e6"],  # Nimzo-Indian Defense
-        ["d2d4", "d7d5", "c2c4", "c7c6"],  # Slav Defense
-        ["e2e4", "e7e5", "g1f3", "f8c5"],  # Italian Game
-        ["e2e4", "e7e5", "g1f3", "f8b4"],  # Ruy Lopez
-        ["e2e4", "c7c5", "f1b5", "a7a6"],  # Sicilian Defense, Rossolimo
-        ["d2d4", "d7d5", "c2c4", "c7c6"],  # Semi-Slav Defense
-        ["d2d4", "d7d5", "g1f3", "g8f6"],  # Queen's Gambit Declined
-        ["d2d4", "d7d5", "c2c4", "e7e5"],  # Albin Countergambit
-        ["e2e4", "e7e5", "g1f3", "g8f6"],  # Petrov's Defense
-        ["d2d4", "d7d5", "c2c4", "d5c4"],  # Queen's Gambit Accepted
-        ["e2e4", "d7d6", "d2d4", "g8f6"],  # Pirc Defense
-        ["e2e4", "g8f6", "e4e5", "f6d5"],  # Alekhine's Defense
-        ["e2e4", "c7c5", "d2d4", "c5d4"],  # Sicilian Defense, Open
-        ["e2e4", "e7e5", "g1f3", "g8c6"],  # Four Knights Game
-        ["e2e4", "e7e5", "d2d4", "e5d4"],  # Scotch Game
-        ["c2c4", "e7e", "g1f3", "e5e4"],  # English Opening, Reversed Sicilian
-        ["d2d4", "f7f5", "g1f3", "g8f6"],  # Dutch Defense
-        ["e2e4", "c7c6", "d2d4", "d7d5"],  # Caro-Kann Defense
-        ["e2e4", "e7e5", "f2f4", "e5f4"],  # King's Gambit Accepted
-        ["e2e4", "e7e5", "f2f4", "e5e4"],  # King's Gambit Declined
-        ["d2d4", "g8f6", "c2c4", "e7e5"],  # Budapest Gambit
-        ["d2d4", "d7d5", "c2c4", "c7c6"],  # Slav Defense, Exchange Variation
-        ["e2e4", "e7e5", "g1f3", "g8f6"],  # Russian Game
-        ["e2e4", "c7c5", "g1f3", "d7d6"],  # Sicilian Defense, Najdorf Variation
-        ["d2d4", "d7d5", "c2c4", "e7e6"],  # Queen's Gambit Declined, Orthodox Defense
-        ["d2d4", "g8f6", "c2c4", "d7d6"],  # King's Indian Defense
-        ["e2e4", "e7e5", "f1c4", "g8f6"],  # Italian Game, Two Knights Defense
-        ["e2e4", "e7e6", "d2d4", "d7d5"],  # French Defense, Tarrasch Variation
-        ["e2e4", "e7e6", "d2d4", "d7d5"],  # French Defense, Advance Variation
-        ["e2e4", "e7e6", "d2d4", "d7d5"],  # French Defense, Winawer Variation
-        ["d2d4", "d7d5", "c2c4", "c7c6"],  # Slav Defense, Czech Variation
-        ["e2e4", "c7c5", "d2d4", "c5d4"],  # Sicilian Defense, Smith-Morra Gambit
-        ["d2d4", "d7d5", "g1f3", "g8f6"],  # Queen's Gambit Declined, Exchange Variation
-        ["e2e4", "c7c5", "g1f3", "e7e6"],  # Sicilian Defense, French Variation
-        ["d2d4", "d7d5", "c2c4", "d5c4"],  # Queen's Gambit Accepted
-        ["e2e4", "c7c5", "f1b5", "a7a6"],  # Sicilian Defense, Canal Attack
-        ["d2d4", "g8f6", "c2c4", "e7e5"],  # Budapest Gambit
-        ["d2d4", "g8f6", "c2c4", "g7g6"],  # King's Indian Defense, Fianchetto
-        ["d2d4", "d7d5", "g1f3", "g8f6"],  # Queen's Gambit Declined, Tartakower
-        ["e2e4", "e7e5", "g1f3", "d7d6"],  # Philidor Defense
-        ["e2e4", "e7e5", "g1f3", "d7d6"],  # Modern Defense
-        ["e2e4", "c7c5", "f1b5", "a7a6"],  # Sicilian Defense, Moscow Variation
-        ["d2d4", "g8f6", "c2c4", "e7e5"],  # Budapest Gambit
-        ["d2d4", "g8f6", "c2c4", "g7g6"],  # King's Indian Defense, Fianchetto
-        ["d2d4", "d7d5", "g1f3", "g8f6"],  # Queen's Gambit Declined, Tartakower
-        ["e2e4", "c7c5", "f1b5", "a7a6"],  # Sicilian Defense, Rossolimo
-        ["e2e4", "c7c5", "f1b5", "a7a6"],  # Sicilian Defense, Moscow
-        ["e2e4", "e7e5", "f1b5", "a7a6"],  # Ruy Lopez, Morphy Defense
-        ["e2e4", "e7e5", "g1f3", "b8c6"],  # Four Knights Game, Scotch Variation
-        ["e2e4", "c7c5", "f1b5", "a7a6"],  # Sicilian Defense, Moscow
-        ["d2d4", "g8f6", "c2c4", "e7e5"],  # Budapest Gambit
-        ["d2d4", "g8f6", "c2c4", "g7g6"],  # King's Indian Defense, Fianchetto
-        ["d2d4", "d7d5", "g1f3", "g8f6"],  # Queen's Gambit Declined, Tartakower
-        ["e2e4", "c7c5", "f1b5", "a7a6"],  # Sicilian Defense, Rossolimo
-        ["e2e4", "e7e5", "f1b5", "a7a6"],  # Ruy Lopez, Morphy Defense
-        ["e2e4", "e7e5", "g1f3", "b8c6"],  # Four Knights Game, Scotch Variation
-    ]
-    
-    opening = random.choice(openings)
-    for move in opening[:num_moves * 2]:  # Apply first 'num_moves' moves for both players
-        board.push_san(move)
+    print(f"{positions} positions, {len(rows)} pseudo-legal moves, {int(legal.sum())} legal")
+    print(f"batched: {batch_time / positions * 1e3:8.2f} ms/position (legal moves, checks, material and full attack maps)")
+    print(f"scalar:  {scalar_time / positions * 1e3:8.2f} ms/position (legal moves, checks and material)")
+    for i, what in mismatches[:10]:
+        print(f"mismatch in position {i}: {what}")
+    print(f"{'OK' if not mismatches else 'FAILED'}: {len(mismatches)} mismatches")
+    return not mismatches
+
+# Fixed-width binary Board12D records: a flags byte (bit 0 set when Black is to move, bits 1-6
+# the castling bits of Board12D.castling_bits), the piece count, then RECORD12D_PIECES slots of
+# (cell, signed piece code as in PIECE_CODES) sorted by cell and padded with zeros. Equal
+# positions encode to equal bytes, and record i of a file starts at a fixed offset.
+RECORD12D_PIECES = 64
+RECORD12D_HEADER = struct.Struct(">BB")
+RECORD12D_PIECE = struct.Struct(">Hb")
+RECORD12D_SIZE = RECORD12D_HEADER.size + RECORD12D_PIECES * RECORD12D_PIECE.size
+
+CODE_PIECES = {code: piece_class for piece_class, code in PIECE_CODES.items()}
+
+def encode_board12d(board):
+    if len(board.squares) > RECORD12D_PIECES:
+        raise ValueError(f"{len(board.squares)} pieces do not fit in a record of {RECORD12D_PIECES}")
+    record = bytearray(RECORD12D_SIZE)
+    RECORD12D_HEADER.pack_into(record, 0, (board.turn == 'Black') | board.castling_bits() << 1, len(board.squares))
+    for slot, index in enumerate(sorted(board.squares)):
+        piece = board.squares[index]
+        RECORD12D_PIECE.pack_into(record, RECORD12D_HEADER.size + slot * RECORD12D_PIECE.size, index,
+                                  PIECE_CODES[type(piece)] * COLOR_SIGNS[piece.color])
+    return bytes(record)
+
+def decode_board12d(data, offset=0):
+    flags, count = RECORD12D_HEADER.unpack_from(data, offset)
+    if flags >> 7 or count > RECORD12D_PIECES:
+        raise ValueError(f"No Board12D record at offset {offset}")
+    board = Board12D()
+    for slot in range(count):
+        index, code = RECORD12D_PIECE.unpack_from(data, offset + RECORD12D_HEADER.size + slot * RECORD12D_PIECE.size)
+        if abs(code) not in CODE_PIECES:
+            raise ValueError(f"Bad piece code {code} in the Board12D record at offset {offset}")
+        board.put(index, CODE_PIECES[abs(code)]('White' if code > 0 else 'Black'))
+    board.set_castling_bits(flags >> 1)
+    board.turn = 'Black' if flags & 1 else 'White'
+    return board
+
+# Text notation for debugging: side to move (w or b), the six castling bits, then each piece
+# as its symbol followed by one digit per axis, e.g. "w 000000 K040000000000 k740000000000"
+def board12d_to_text(board):
+    bits = board.castling_bits()
+    pieces = [board.squares[index].symbol() + ''.join(map(str, BOARD_POSITIONS[index])) for index in sorted(board.squares)]
+    return ' '.join(['w' if board.turn == 'White' else 'b', ''.join(str(bits >> i & 1) for i in range(6))] + pieces)
+
+PIECE_LETTERS = {piece_class.letter: piece_class for piece_class in PIECE_CLASSES}
+
+def board12d_from_text(text):
+    fields = text.split()
+    if len(fields) < 2 or fields[0] not in ('w', 'b') or len(fields[1]) != 6 or set(fields[1]) - set('01'):
+        raise ValueError(f"Not a Board12D position: {text!r}")
+    board = Board12D()
+    for field in fields[2:]:
+        piece_class = PIECE_LETTERS.get(field[0].upper())
+        if piece_class is None or len(field) != BOARD_DIMENSIONS + 1 or not field[1:].isdigit():
+            raise ValueError(f"Not a Board12D piece: {field!r}")
+        board.place_piece(piece_class('White' if field[0].isupper() else 'Black'), tuple(int(digit) for digit in field[1:]))
+    board.set_castling_bits(sum(int(bit) << i for i, bit in enumerate(fields[1])))
+    board.turn = 'White' if fields[0] == 'w' else 'Black'
+    return board
+
+DATASET12D_HEADER = struct.Struct(">4sHH")
+DATASET12D_MAGIC = b"B12D"
+DATASET12D_VERSION = 1
+
+# Append-only file of Board12D records after a header of magic, version and record size.
+# Reading memory-maps the file and decodes one record at a time, so files of millions of
+# positions are never loaded whole; records appended later show up in the next iteration.
+class Board12DDataset:
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path) and os.path.getsize(path):
+            self.validate(path)
+
+    # Raises ValueError if the file is not a dataset or ends in a partial record; returns the record count
+    @staticmethod
+    def validate(path):
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            header = f.read(DATASET12D_HEADER.size)
+        if len(header) < DATASET12D_HEADER.size:
+            raise ValueError(f"{path}: truncated header")
+        magic, version, record_size = DATASET12D_HEADER.unpack(header)
+        if magic != DATASET12D_MAGIC or version != DATASET12D_VERSION or record_size != RECORD12D_SIZE:
+            raise ValueError(f"{path}: not a version {DATASET12D_VERSION} Board12D dataset")
+        if (size - DATASET12D_HEADER.size) % RECORD12D_SIZE:
+            raise ValueError(f"{path}: size {size} ends in a partial record")
+        return (size - DATASET12D_HEADER.size) // RECORD12D_SIZE
+
+    def __len__(self):
+        if not os.path.exists(self.path) or not os.path.getsize(self.path):
+            return 0
+        return self.validate(self.path)
+
+    # Appends the boards and returns how many were written
+    def append(self, boards):
+        count = 0
+        with open(self.path, "ab") as f:
+            if f.tell() == 0:
+                f.write(DATASET12D_HEADER.pack(DATASET12D_MAGIC, DATASET12D_VERSION, RECORD12D_SIZE))
+            for board in boards:
+                f.write(encode_board12d(board))
+                count += 1
+        return count
+
+    def __iter__(self):
+        return self.positions()
+
+    def __getitem__(self, i):
+        count = len(self)
+        if i < 0:
+            i += count
+        if not 0 <= i < count:
+            raise IndexError(i)
+        return next(self.positions(i, i + 1))
+
+    # Decoded positions start..stop-1 of the file as it is when iteration begins
+    def positions(self, start=0, stop=None):
+        count = len(self)
+        stop = count if stop is None else min(stop, count)
+        if start >= stop:
+            return
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for i in range(start, stop):
+                yield decode_board12d(data, DATASET12D_HEADER.size + i * RECORD12D_SIZE)
+
+    # The same positions as (cells, codes, sides) arrays for the batched functions, batch_size records at
+    # a time, read straight from the memory map without building Board12D objects
+    def arrays(self, start=0, stop=None, batch_size=1024):
+        if np is None:
+            raise ImportError("Board12DDataset.arrays needs NumPy")
+        record = np.dtype([('flags', 'u1'), ('count', 'u1'), ('pieces', [('cell', '>u2'), ('code', 'i1')], RECORD12D_PIECES)])
+        count = len(self)
+        stop = count if stop is None else min(stop, count)
+        if start >= stop:
+            return
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for first in range(start, stop, batch_size):
+                records = np.frombuffer(data, record, min(batch_size, stop - first), DATASET12D_HEADER.size + first * RECORD12D_SIZE)
+                # Records already hold sorted, zero-padded piece lists; keep the slots in use
+                width = max(1, int(records['count'].max()))
+                cells = records['pieces']['cell'][:, :width].astype(np.intp)
+                codes = records['pieces']['code'][:, :width].astype(np.int8)
+                sides = np.where(records['flags'] & 1, -1, 1).astype(np.int8)
+                # The memory map cannot close while an array still points into it
+                del records
+                yield cells, codes, sides
+
+# Writes random layouts (and the standard one) to a dataset, reads them back through the
+# generators and reports the round trip and the read speed
+def benchmark_board12d_dataset(path, positions=10000, seed=0):
+    rng = random.Random(seed)
+    boards = [standard_board12d()]
+    for i in range(positions - 1):
+        board = Board12D()
+        for position, piece in random_board12d_layout(rng.randrange(2, RECORD12D_PIECES + 1), seed * positions + i,
+                                                      rng.choice((3, 4, BOARD_DIMENSIONS))).items():
+            board.place_piece(piece, position)
+        board.set_castling_bits(rng.randrange(64))
+        board.turn = rng.choice(('White', 'Black'))
+        boards.append(board)
+    dataset = Board12DDataset(path)
+    first = len(dataset)
+
+    start = time.perf_counter()
+    dataset.append(boards)
+    write_time = time.perf_counter() - start
+    start = time.perf_counter()
+    read = list(dataset.positions(first))
+    read_time = time.perf_counter() - start
+
+    mismatches = sum(1 for board, copy in zip(boards, read) if encode_board12d(board) != encode_board12d(copy)
+                     or board12d_from_text(board12d_to_text(board)).squares != board.squares)
+    print(f"{path}: {len(dataset)} records of {RECORD12D_SIZE} bytes")
+    print(f"write:  {positions / write_time:12,.0f} positions/s")
+    print(f"read:   {positions / read_time:12,.0f} positions/s as Board12D")
+    if np is not None:
+        start = time.perf_counter()
+        arrays = sum(len(codes) for _, codes, _ in dataset.arrays(first))
+        print(f"arrays: {arrays / (time.perf_counter() - start):12,.0f} positions/s as batched arrays")
+    print(f"{'OK' if not mismatches and len(read) == positions else 'FAILED'}: {mismatches} round-trip mismatches")
+    return not mismatches and len(read) == positions
+
+# Per-process searcher for AIPlayer.parallel_search, kept so the table warms up across the tasks
+# of one search, and the number of the search its last task belonged to
+search_worker_player = None
+search_worker_search = None
+
+def init_search_worker(options, stop_event=None):
+    global search_worker_player
+    search_worker_player = AIPlayer(chess.WHITE, **options)
+    search_worker_player.stop_event = stop_event
+
+def search_root_move_task(board, move, depth, alpha, beta, deadline, max_nodes, search):
+    global search_worker_search
+    player = search_worker_player
+    remaining = None
+    if deadline is not None:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return None, 0, 0, [], 0
+    player.start_search(board, chess.engine.Limit(time=remaining, nodes=max_nodes), search != search_worker_search)
+    search_worker_search = search
+    player.root_depth = depth
+    player.make_move(board, move)
+    try:
+        value = -player.negamax(board, depth - 1, -beta, -alpha)
+    except SearchAborted:
+        value = None
+    finally:
+        player.unmake_move(board)
+    # The move followed by the replies this worker's table expects, for the main process's table
+    pv = player.principal_variation(board, move, depth) if value is not None else []
+    return value, player.nodes, player.qnodes, pv, player.stats.seldepth
+
+# Win At Chess tactical positions with their best moves
+SEARCH_TEST_POSITIONS = [
+    ("2rr3k/pp3pp1/1nnqbN1p/3pN3/2pP4/2P3Q1/PPB4P/R4RK1 w - - 0 1", "g3g6"),
+    ("8/7p/5k2/5p2/p1p2P2/Pr1pPK2/1P1R3P/8 b - - 0 1", "b3b2"),
+    ("5rk1/1ppb3p/p1pb4/6q1/3P1p1r/2P1R2P/PP1BQ1P1/5RKN w - - 0 1", "e3g3"),
+    ("r1bq2rk/pp3pbp/2p1p1pQ/7P/3P4/2PB1N2/PP3PPR/2KR4 w - - 0 1", "h6h7"),
+    ("5k2/6pp/p1qN4/1p1p4/3P4/2PKP2Q/PP3r2/3R4 b - - 0 1", "c6c4"),
+    ("7k/p7/1R5K/6r1/6p1/6P1/8/8 w - - 0 1", "b6b7"),
+    ("rnbqkb1r/pppp1ppp/8/4P3/6n1/7P/PPPNPPP1/R1BQKBNR b KQkq - 0 1", "g4e3"),
+    ("r4q1k/p2bR1rp/2p2Q1N/5p2/5p2/2P5/PP3PPP/R5K1 w - - 0 1", "e7f7"),
+    ("3q1rk1/p4pp1/2pb3p/3p4/6Pr/1PNQ4/P1PB1PP1/4RRK1 b - - 0 1", "d6h2"),
+]
+
+SEARCH_FEATURES = ['pvs', 'null_move', 'lmr', 'check_extensions', 'aspiration']
+
+# Fixed-depth searches of the test positions and EVAL_REGRESSION_FENS with no selective
+# features, each feature alone, and all of them. Reports nodes against the plain search, best
+# moves found, and how often the move matches the plain search.
+def benchmark_search_features(depth=5):
+    positions = SEARCH_TEST_POSITIONS + [(fen, None) for fen in EVAL_REGRESSION_FENS]
+    configurations = [("plain", [])] + [(feature, [feature]) for feature in SEARCH_FEATURES] + [("all", SEARCH_FEATURES)]
+    plain_nodes = None
+    plain_moves = None
+    for name, enabled in configurations:
+        options = {feature: feature in enabled for feature in SEARCH_FEATURES}
+        nodes = 0
+        moves = []
+        start = time.perf_counter()
+        for fen, _ in positions:
+            board = chess.Board(fen)
+            # A fresh player per position, not a deterministic one, which would drop most features
+            player = AIPlayer(board.turn, **options)
+            moves.append(player.get_best_move(board, chess.engine.Limit(depth=depth)))
+            nodes += player.nodes
+        elapsed = time.perf_counter() - start
+        if plain_nodes is None:
+            plain_nodes = nodes
+            plain_moves = moves
+        solved = sum(1 for (_, best), move in zip(positions, moves) if best is not None and move.uci() == best)
+        same = sum(1 for a, b in zip(moves, plain_moves) if a == b)
+        print(f"{name:17} nodes {nodes:9}  {nodes / plain_nodes:6.1%} of plain  {elapsed:7.2f}s  "
+              f"best move {solved}/{len(SEARCH_TEST_POSITIONS)}  same as plain {same}/{len(positions)}")
+
+# Times fixed-depth searches with 1, 2, 4, ... workers and reports the speedup over serial
+def benchmark_parallel_scaling(fens=None, depth=4, worker_counts=(1, 2, 4, 8, 16)):
+    fens = fens or EVAL_REGRESSION_FENS
+    baseline = None
+    serial_moves = None
+    for workers in worker_counts:
+        player = AIPlayer(chess.WHITE, depth=depth, workers=workers, deterministic=True)
+        moves = []
+        start = time.perf_counter()
+        for fen in fens:
+            board = chess.Board(fen)
+            player.color = board.turn
+            moves.append(player.get_best_move(board, chess.engine.Limit(depth=depth)))
+        elapsed = time.perf_counter() - start
+        player.close()
+        if baseline is None:
+            baseline = elapsed
+            serial_moves = moves
+        same = sum(1 for a, b in zip(moves, serial_moves) if a == b)
+        print(f"{workers:>2} workers: {elapsed:8.2f}s  speedup {baseline / elapsed:5.2f}x  same move {same}/{len(fens)}")
+
+# Standard perft positions with their known node counts for depths 1, 2, 3, ...
+PERFT_POSITIONS = [
+    ("startpos", chess.STARTING_FEN, [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862, 4085603]),
+    ("position3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238, 674624]),
+    ("position4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467, 422333]),
+    ("position5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379, 2103487]),
+    ("position6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", [46, 2079, 89890, 3894594]),
+]
+
+def perft(board, depth):
+    if depth == 0:
+        return 1
+    if depth == 1:
+        return board.legal_moves.count()
+    nodes = 0
+    for move in board.legal_moves:
+        board.push(move)
+        nodes += perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+def perft_board12d(board, depth):
+    if depth == 0:
+        return 1
+    moves = board.legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        board.push_move(move)
+        nodes += perft_board12d(board, depth - 1)
+        board.pop()
+    return nodes
+
+# Node count below each root move, as (move, nodes) pairs
+def perft_divide_board12d(board, depth):
+    divide = []
+    for move in board.legal_moves():
+        board.push_move(move)
+        divide.append((move, perft_board12d(board, depth - 1)))
+        board.pop()
+    return divide
+
+# Fixed Board12D starting layouts for perft: the standard setup and a few seeded random ones
+def perft_layouts_board12d(random_layouts=2, num_pieces=12, free_axes=3):
+    layouts = [("standard", standard_board12d())]
+    for seed in range(random_layouts):
+        board = Board12D()
+        for position, piece in random_board12d_layout(num_pieces, seed + 100, free_axes).items():
+            board.place_piece(piece, position)
+        layouts.append((f"random-{seed}", board))
+    return layouts
+
+# Checks chess.Board perft counts against the reference numbers, then prints Board12D divide
+# output and timing. Returns False if any count differs.
+def run_perft(depth=3, depth_12d=2, divide=True):
+    ok = True
+    for name, fen, expected in PERFT_POSITIONS:
+        board = chess.Board(fen)
+        for d in range(1, min(depth, len(expected)) + 1):
+            start = time.perf_counter()
+            nodes = perft(board, d)
+            elapsed = time.perf_counter() - start
+            status = "ok" if nodes == expected[d - 1] else f"FAIL (expected {expected[d - 1]})"
+            ok = ok and nodes == expected[d - 1]
+            print(f"{name:10} depth {d}  {nodes:10}  {elapsed:7.2f}s  {nodes / max(elapsed, 1e-9):12,.0f} nodes/s  {status}")
+
+    # Pieces stand between the king and both rooks at the start, so castling must be illegal
+    castles = [move for move in standard_board12d().legal_moves() if len(move) == 3]
+    if castles:
+        print(f"12D standard: castling allowed from the start position: {castles}")
+        ok = False
+
+    for name, board in perft_layouts_board12d():
+        before = board.squares.copy()
+        start = time.perf_counter()
+        split = perft_divide_board12d(board, depth_12d)
+        elapsed = time.perf_counter() - start
+        if divide:
+            for move, nodes in split:
+                print(f"  {board.describe_move(move)}: {nodes}")
+        nodes = sum(count for _, count in split)
+        print(f"12D {name:10} depth {depth_12d}  moves {len(split):5}  {nodes:10}  {elapsed:7.2f}s  "
+              f"{nodes / max(elapsed, 1e-9):12,.0f} nodes/s")
+        # Every push must be undone exactly, or the counts above are meaningless
+        if board.squares != before or board.move_stack:
+            print(f"12D {name}: board not restored after perft")
+            ok = False
+    return ok
+
+# Throughput of the move generator, check detection and search, as operations per second
+def measure_performance(layouts=10, num_pieces=32, search_depth=3):
+    boards = []
+    for seed in range(layouts):
+        board = Board12D()
+        for position, piece in random_board12d_layout(num_pieces, seed, free_axes=4).items():
+            board.place_piece(piece, position)
+        boards.append(board)
+    # Fill the lazily built move tables first so only steady-state lookups are timed
+    for board in boards:
+        for color in ('White', 'Black'):
+            board.is_checkmate(color)
+
+    # Best of a few rounds, so a busy machine shows up as noise less often than as a regression
+    def rate(run, min_time=0.2, rounds=3):
+        best = 0.0
+        for _ in range(rounds):
+            count = 0
+            start = time.perf_counter()
+            while True:
+                count += run()
+                elapsed = time.perf_counter() - start
+                if elapsed >= min_time:
+                    break
+            best = max(best, count / elapsed)
+        return best
+
+    results = {}
+    for piece_class in PIECE_CLASSES:
+        pieces = [(board, BOARD_POSITIONS[index], piece) for board in boards
+                  for index, piece in board.squares.items() if type(piece) is piece_class]
+        if pieces:
+            results[f"valid_moves.{piece_class.__name__}"] = rate(
+                lambda: sum(len(piece.valid_moves(position, board)) for board, position, piece in pieces))
+
+    # Calls method(board, color) for every board and both colors; returns the number of calls
+    def for_both_colors(method):
+        calls = 0
+        for board in boards:
+            for color in ('White', 'Black'):
+                method(board, color)
+                calls += 1
+        return calls
+    results["is_in_check"] = rate(lambda: for_both_colors(Board12D.is_in_check))
+    results["is_checkmate"] = rate(lambda: for_both_colors(Board12D.is_checkmate))
+
+    def search():
+        nodes = 0
+        for fen in EVAL_REGRESSION_FENS:
+            board = chess.Board(fen)
+            player = AIPlayer(board.turn, depth=search_depth)
+            player.get_best_move(board, chess.engine.Limit(depth=search_depth))
+            nodes += player.nodes + player.qnodes
+        return nodes
+    results["AIPlayer.negamax"] = rate(search, min_time=0, rounds=2)
+    return results
+
+# Compares measured rates with a saved baseline and reports anything more than threshold
+# slower. A missing baseline (or save=True) records the current numbers instead.
+def run_benchmark_suite(baseline_path="bench_baseline.json", threshold=0.3, save=False):
+    results = measure_performance()
+    baseline = {}
+    if os.path.exists(baseline_path) and not save:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+    regressions = []
+    for name, value in results.items():
+        line = f"{name:24} {value:14,.0f}/s"
+        if name in baseline:
+            change = value / baseline[name] - 1
+            line += f"   baseline {baseline[name]:14,.0f}/s  {change:+7.1%}"
+            if change < -threshold:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+    if not baseline:
+        with open(baseline_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {baseline_path}")
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) more than {threshold:.0%} slower than {baseline_path}")
+    return not regressions
+
+# Opening lines in UCI notation, used when no Polyglot book is given
+OPENING_LINES = [
+    ["e2e4", "e7e5", "g1f3", "b8c6"],  # King's Pawn Opening
+    ["d2d4", "d7d5", "c2c4", "e7e6"],  # Queen's Gambit
+    ["c2c4", "e7e5", "g1f3", "b8c6"],  # English Opening
+    ["g1f3", "d7d5", "g2g3", "c8f5"],  # Reti Opening
+    ["e2e4", "c7c5", "g1f3", "d7d6"],  # Sicilian Defense
+    ["e2e4", "e7e6", "d2d4", "d7d5"],  # French Defense
+    ["e2e4", "c7c6", "d2d4", "d7d5"],  # Caro-Kann Defense
+    ["e2e4", "e7e5", "f2f4", "e5f4"],  # King's Gambit
+    ["d2d4", "g8f6", "c2c4", "e7e6"],  # Nimzo-Indian Defense
+    ["d2d4", "d7d5", "c2c4", "c7c6"],  # Slav Defense
+    ["e2e4", "e7e5", "g1f3", "f8c5"],  # Italian Game
+    ["e2e4", "e7e5", "g1f3", "f8b4"],  # Ruy Lopez
+    ["e2e4", "c7c5", "f1b5", "a7a6"],  # Sicilian Defense, Rossolimo
+    ["d2d4", "d7d5", "g1f3", "g8f6"],  # Queen's Gambit Declined
+    ["d2d4", "d7d5", "c2c4", "e7e5"],  # Albin Countergambit
+    ["e2e4", "e7e5", "g1f3", "g8f6"],  # Petrov's Defense
+    ["d2d4", "d7d5", "c2c4", "d5c4"],  # Queen's Gambit Accepted
+    ["e2e4", "d7d6", "d2d4", "g8f6"],  # Pirc Defense
+    ["e2e4", "g8f6", "e4e5", "f6d5"],  # Alekhine's Defense
+    ["e2e4", "c7c5", "d2d4", "c5d4"],  # Sicilian Defense, Open
+    ["e2e4", "e7e5", "d2d4", "e5d4"],  # Scotch Game
+    ["c2c4", "e7e5", "g1f3", "e5e4"],  # English Opening, Reversed Sicilian
+    ["d2d4", "f7f5", "g1f3", "g8f6"],  # Dutch Defense
+    ["e2e4", "e7e5", "f2f4", "f8c5"],  # King's Gambit Declined
+    ["d2d4", "g8f6", "c2c4", "e7e5"],  # Budapest Gambit
+    ["d2d4", "g8f6", "c2c4", "d7d6"],  # King's Indian Defense
+    ["e2e4", "e7e5", "f1c4", "g8f6"],  # Italian Game, Two Knights Defense
+    ["e2e4", "c7c5", "g1f3", "e7e6"],  # Sicilian Defense, French Variation
+    ["d2d4", "g8f6", "c2c4", "g7g6"],  # King's Indian Defense, Fianchetto
+    ["e2e4", "e7e5", "g1f3", "d7d6"],  # Philidor Defense
+    ["e2e4", "e7e5", "f1b5", "a7a6"],  # Ruy Lopez, Morphy Defense
+]
+
+# Size of one Polyglot book entry: key (u64), move (u16), weight (u16), learn (u32), big-endian
+POLYGLOT_ENTRY = struct.Struct(">QHHI")
+
+# Polyglot opening book. Lookups go through python-chess's memory-mapped reader, which binary
+# searches the entries (sorted by Zobrist key); the file is checked once when it is opened.
+class OpeningBook:
+    def __init__(self, path, seed=None, minimum_weight=1):
+        self.path = path
+        self.minimum_weight = minimum_weight
+        self.random = random.Random(seed)
+        self.entries, self.invalid_entries = self.validate(path)
+        self.reader = chess.polyglot.open_reader(path)
+
+    # Raises ValueError if the file is not a usable book; returns (entries, invalid entries)
+    @staticmethod
+    def validate(path):
+        size = os.path.getsize(path)
+        if size % POLYGLOT_ENTRY.size:
+            raise ValueError(f"{path}: size {size} is not a multiple of {POLYGLOT_ENTRY.size} bytes")
+        if size == 0:
+            return 0, 0
+        invalid = 0
+        previous_key = 0
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for i, (key, move, weight, _) in enumerate(POLYGLOT_ENTRY.iter_unpack(data)):
+                if key < previous_key:
+                    raise ValueError(f"{path}: entry {i} is out of order; the book must be sorted by key")
+                previous_key = key
+                # Bits 12-14 hold the promotion piece (0 = none, 1-4 = knight..queen)
+                if move & 0x3f == (move >> 6) & 0x3f or move >> 12 > 4:
+                    invalid += 1
+        return size // POLYGLOT_ENTRY.size, invalid
+
+    # Weighted random book move for the position among the entries of at least minimum_weight,
+    # or None when there are none
+    def choose(self, board):
+        entries = self.moves(board)
+        if not entries:
+            return None
+        weights = [weight for _, weight in entries]
+        # All-zero weights (with minimum_weight 0) leave nothing to weigh, so pick uniformly
+        if not any(weights):
+            return self.random.choice(entries)[0]
+        return self.random.choices(entries, weights=weights)[0][0]
+
+    def moves(self, board):
+        return [(entry.move, entry.weight) for entry in self.reader.find_all(board, minimum_weight=self.minimum_weight)]
+
+    def close(self):
+        self.reader.close()
+
+# Writes lines of UCI moves as a Polyglot book; a move's weight is the number of lines playing it
+def write_polyglot_book(path, lines=None):
+    weights = collections.Counter()
+    for line in lines or OPENING_LINES:
+        board = chess.Board()
+        for uci in line:
+            move = board.parse_uci(uci)
+            weights[chess.polyglot.zobrist_hash(board), polyglot_move(board, move)] += 1
+            board.push(move)
+    with open(path, "wb") as f:
+        for (key, move), weight in sorted(weights.items()):
+            f.write(POLYGLOT_ENTRY.pack(key, move, min(weight, 0xffff), 0))
+
+# Polyglot encodes castling as the king capturing its own rook
+def polyglot_move(board, move):
+    if board.is_castling(move):
+        rook_file = 7 if board.is_kingside_castling(move) else 0
+        move = chess.Move(move.from_square, chess.square(rook_file, chess.square_rank(move.from_square)))
+    promotion = move.promotion - 1 if move.promotion else 0
+    return move.to_square | move.from_square << 6 | promotion << 12
+
+def randomize_opening_moves(board, num_moves=2, book=None):
+    # Apply first 'num_moves' moves for both players
+    if book is not None:
+        for _ in range(num_moves * 2):
+            move = book.choose(board)
+            if move is None:
+                break
+            board.push(move)
+        return
+    opening = random.choice(OPENING_LINES)
+    for move in opening[:num_moves * 2]:
+        board.push_uci(move)
+
+def default_engine_path():
+    return os.environ.get("STOCKFISH_PATH") or shutil.which("stockfish") or "stockfish"
+
+# Warm UCI engine processes for asynchronous games. Each game borrows one engine and hands it
+# back afterwards, so engines are started once per session instead of once per game.
+class EnginePool:
+    def __init__(self, engine_path=None, size=1, threads=None, hash_mb=None):
+        self.engine_path = engine_path or default_engine_path()
+        self.size = size
+        self.threads = threads
+        self.hash_mb = hash_mb
+        self.engines = []
+        self.idle = None
+
+    async def start(self):
+        self.idle = asyncio.Queue()
+        for _ in range(self.size):
+            _, engine = await chess.engine.popen_uci(self.engine_path)
+            options = {}
+            if self.threads is not None and 'Threads' in engine.options:
+                options['Threads'] = self.threads
+            if self.hash_mb is not None and 'Hash' in engine.options:
+                options['Hash'] = self.hash_mb
+            if options:
+                await engine.configure(options)
+            self.engines.append(engine)
+            self.idle.put_nowait(engine)
+
+    async def acquire(self):
+        return await self.idle.get()
+
+    def release(self, engine):
+        self.idle.put_nowait(engine)
+
+    async def close(self):
+        for engine in self.engines:
+            await engine.quit()
+        self.engines = []
+
+# 12D AI (White) against a pooled engine. The AI searches on a worker thread so the event loop
+# keeps serving other games, and with ponder=True it keeps searching while the engine thinks.
+async def play_game_async(pool, game_index, seed=None, ai_limit=None, engine_limit=None, ponder=False, watch=True,
+                          ai_info=False, ai_profile=None, book=None, tablebase=None, ai_workers=1):
+    if seed is not None:
+        random.seed(seed)
+    board = chess.Board()
+    randomize_opening_moves(board, book=book)
+    ai = AIPlayer(chess.WHITE, depth=3, info_callback=print if ai_info else None, profile_dir=ai_profile, book=book,
+                  tablebase=tablebase, workers=ai_workers)
+    loop = asyncio.get_running_loop()
 
-def watch_12d_vs_stockfish(thinking_time, num_games, stockfish_depth=None):
-    for i in range(num_games):
+    engine = await pool.acquire()
+    try:
+        while not board.is_game_over():
+            if board.turn == chess.WHITE:
+                move = await loop.run_in_executor(None, ai.get_best_move, board.copy(), ai_limit)
+            else:
+                ponder_future = loop.run_in_executor(None, ai.ponder, board.copy()) if ponder else None
+                try:
+                    result = await engine.play(board, engine_limit, game=game_index)
+                finally:
+                    if ponder_future is not None:
+                        ai.stop()
+                        await ponder_future
+                        # ponder() may have returned before the stop, leaving it set for the next search
+                        ai.clear_stop()
+                move = result.move
+            board.push(move)
+            if watch:
+                print(board)
+    finally:
+        pool.release(engine)
+        ai.close()
+    return board
+
+async def watch_games_async(num_games, engine_limit, ai_limit=None, engine_path=None, engine_threads=None,
+                            engine_hash=None, concurrency=1, ponder=False, ai_info=False, ai_profile=None, book=None,
+                            tablebase=None, ai_workers=1):
+    pool = EnginePool(engine_path, size=concurrency, threads=engine_threads, hash_mb=engine_hash)
+    try:
+        await pool.start()
+    except (PermissionError, FileNotFoundError) as e:
+        print(f"Failed to open engine {pool.engine_path}: {e}")
+        return
+
+    async def run(i):
         print(f"Game {i + 1} of {num_games}")
         seed = int(time.time()) + i  # Generate a unique seed for each game
-        play_game(thinking_time, watch=True, seed=seed, stockfish_depth=stockfish_depth)
+        board = await play_game_async(pool, i, seed, ai_limit, engine_limit, ponder, watch=concurrency == 1,
+                                      ai_info=ai_info, ai_profile=ai_profile, book=book, tablebase=tablebase,
+                                      ai_workers=ai_workers)
+        print(f"Game {i + 1} of {num_games} finished: {board.result()}")
+        print_game_result(board, watch=True)
+
+    try:
+        await asyncio.gather(*(run(i) for i in range(num_games)))
+    finally:
+        await pool.close()
+
+def watch_12d_vs_stockfish(thinking_time, num_games, stockfish_depth=None, ai_limit=None, ai_workers=1,
+                           engine_path=None, engine_threads=None, engine_hash=None, concurrency=1, ponder=False,
+                           ai_info=False, ai_profile=None, book=None, tablebase=None):
+    if stockfish_depth:
+        engine_limit = chess.engine.Limit(depth=stockfish_depth)
+    else:
+        engine_limit = chess.engine.Limit(time=thinking_time)
+    asyncio.run(watch_games_async(num_games, engine_limit, ai_limit, engine_path, engine_threads, engine_hash,
+                                  concurrency, ponder, ai_info, ai_profile, book, tablebase, ai_workers))
 
-def play_game(thinking_time=10.0, watch=False, seed=None, stockfish_depth=None):
+def play_game(thinking_time=10.0, watch=False, seed=None, stockfish_depth=None, ai_limit=None, ai_workers=1,
+              engine_path=None, ai_info=False, ai_profile=None, book=None, tablebase=None):
     if seed is not None:
         random.seed(seed)
     
     # Initialize the python-chess board and engine
     board = chess.Board()
+    info_callback = print if ai_info else None
+    white_ai = AIPlayer(chess.WHITE, depth=3, workers=ai_workers, info_callback=info_callback, profile_dir=ai_profile,
+                        book=book, tablebase=tablebase)
 
     # If watching 12D AI vs Stockfish, randomize the opening moves
     if watch:
-        randomize_opening_moves(board)
+        randomize_opening_moves(board, book=book)
 
     # If playing against 12D AI, initialize the board with only one move by 12D AI
     else:
-        white_ai = AIPlayer(chess.WHITE, depth=3)
-        move = white_ai.get_best_move(board)
+        move = white_ai.get_best_move(board, ai_limit)
         board.push(move)
 
     # Determine the correct path for the Stockfish executable
-    stockfish_path = os.path.join(os.path.dirname(sys.executable), "C:/Users/NEC/Documents/Chess12/stockfish/stockfish-windows-x86-64-avx2.exe")
+    stockfish_path = engine_path or default_engine_path()
 
     try:
         engine = chess.engine.SimpleEngine.popen_uci(stockfish_path)
@@ -517,12 +3118,13 @@ def play_game(thinking_time=10.0, watch=False, seed=None, stockfish_depth=None):
         print(f"Stockfish executable not found: {e}")
         return
 
-    black_ai = AIPlayer(chess.BLACK, depth=3)
+    black_ai = AIPlayer(chess.BLACK, depth=3, workers=ai_workers, info_callback=info_callback, profile_dir=ai_profile,
+                        book=book, tablebase=tablebase)
 
     while not board.is_game_over():
         if board.turn == chess.WHITE:
             if watch:
-                move = white_ai.get_best_move(board)
+                move = white_ai.get_best_move(board, ai_limit)
             else:
                 print(board)
                 move = input("Enter your move (e.g., e2e4): ")
@@ -542,19 +3144,23 @@ def play_game(thinking_time=10.0, watch=False, seed=None, stockfish_depth=None):
                     result = engine.play(board, chess.engine.Limit(time=thinking_time))
                 board.push(result.move)
             else:
-                move = black_ai.get_best_move(board)
+                move = black_ai.get_best_move(board, ai_limit)
                 board.push(move)
 
         print(board)
 
     engine.quit()
+    white_ai.close()
+    black_ai.close()
+    print_game_result(board, watch)
 
+def print_game_result(board, watch):
     # Determine the game outcome
     if board.is_checkmate():
         if board.turn == chess.WHITE:
-            print("Checkmate! Black (12D AI) wins!")
+            print("Checkmate! Black (Stockfish) wins!" if watch else "Checkmate! Black (12D AI) wins!")
         else:
-            print("Checkmate! White (Stockfish) wins!" if watch else "Checkmate! White (Player) wins!")
+            print("Checkmate! White (12D AI) wins!" if watch else "Checkmate! White (Player) wins!")
     elif board.is_stalemate():
         print("Stalemate!")
     elif board.is_insufficient_material():
@@ -568,11 +3174,612 @@ def play_game(thinking_time=10.0, watch=False, seed=None, stockfish_depth=None):
     else:
         print("Game over (other reason)!")
 
+# Elo difference from a W/D/L record with the half-width of its 95% confidence interval (None
+# before any game). A clean sweep either way counts one extra draw so it has some spread, and
+# scores are kept off 0 and 1 so the numbers stay finite.
+def elo_difference(wins, draws, losses):
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0, None
+    if games in (wins, losses):
+        draws += 1
+        games += 1
+    score = (wins + 0.5 * draws) / games
+    bound = 0.5 / games
+
+    def to_elo(p):
+        p = min(max(p, bound), 1 - bound)
+        return 400 * math.log10(p / (1 - p))
+
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    margin = 1.96 * math.sqrt(variance / games)
+    return to_elo(score), (to_elo(score + margin) - to_elo(score - margin)) / 2
+
+# Opponent engine, opening book and tablebase owned by a match worker process
+match_worker_engine = None
+match_worker_book = None
+match_worker_tablebase = None
+
+def init_match_worker(engine_command, book_path=None, tablebase=None):
+    global match_worker_engine, match_worker_book, match_worker_tablebase
+    match_worker_engine = chess.engine.SimpleEngine.popen_uci(shlex.split(engine_command))
+    if book_path is not None:
+        match_worker_book = OpeningBook(book_path)
+    match_worker_tablebase = tablebase
+    # Pool workers skip atexit handlers, so close the engine through multiprocessing's finalizers
+    multiprocessing.util.Finalize(None, match_worker_engine.quit, exitpriority=10)
+
+def play_match_game(game_index, seed, ai_white, ai_limit, engine_limit, ai_depth=3, ai_profile=None):
+    random.seed(seed)
+    board = chess.Board()
+    if match_worker_book is not None:
+        match_worker_book.random.seed(seed)
+    randomize_opening_moves(board, book=match_worker_book)
+    ai_color = chess.WHITE if ai_white else chess.BLACK
+    ai = AIPlayer(ai_color, depth=ai_depth, profile_dir=ai_profile, book=match_worker_book,
+                  tablebase=match_worker_tablebase)
+    ai_times = []
+    ai_stats = []
+    engine_times = []
+
+    while not board.is_game_over():
+        start = time.perf_counter()
+        if board.turn == ai_color:
+            move = ai.get_best_move(board, ai_limit)
+            ai_times.append(time.perf_counter() - start)
+            ai_stats.append(ai.stats.as_dict())
+        else:
+            move = match_worker_engine.play(board, engine_limit).move
+            engine_times.append(time.perf_counter() - start)
+        board.push(move)
+
+    result = board.result()
+    if result == '1-0':
+        score = 1.0 if ai_white else 0.0
+    elif result == '0-1':
+        score = 0.0 if ai_white else 1.0
+    else:
+        score = 0.5
+
+    game = chess.pgn.Game.from_board(board)
+    game.headers["Event"] = "12D Chess Engine match"
+    game.headers["Round"] = str(game_index + 1)
+    game.headers["White"] = "12D Chess Engine" if ai_white else match_worker_engine.id.get("name", "Opponent")
+    game.headers["Black"] = match_worker_engine.id.get("name", "Opponent") if ai_white else "12D Chess Engine"
+    game.headers["Result"] = result
+    outcome = board.outcome()
+
+    return {
+        'game': game_index + 1,
+        'seed': seed,
+        'ai_color': 'White' if ai_white else 'Black',
+        'result': result,
+        'score': score,
+        'termination': outcome.termination.name.lower() if outcome else None,
+        'plies': len(board.move_stack),
+        'ai_avg_move_time': sum(ai_times) / len(ai_times) if ai_times else 0.0,
+        'engine_avg_move_time': sum(engine_times) / len(engine_times) if engine_times else 0.0,
+        'ai_avg_depth': sum(stats['depth'] for stats in ai_stats) / len(ai_stats) if ai_stats else 0.0,
+        'ai_avg_nps': sum(stats['nps'] for stats in ai_stats) / len(ai_stats) if ai_stats else 0.0,
+        'ai_search': ai_stats,
+        'pgn': str(game),
+    }
+
+# Plays num_games against a UCI engine in parallel worker processes (each with its own engine
+# subprocess), alternating colors, and appends one JSON line per finished game to results_path
+def run_match(engine_command, num_games, workers=1, results_path="match_results.jsonl", ai_limit=None,
+              engine_limit=None, seed=None, ai_depth=3, ai_profile=None, book_path=None, tablebase=None):
+    engine_limit = engine_limit or chess.engine.Limit(time=0.1)
+    seed = int(time.time()) if seed is None else seed
+    wins = draws = losses = 0
+    ai_time = engine_time = 0.0
+
+    with open(results_path, 'a') as results, concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=init_match_worker, initargs=(engine_command, book_path, tablebase)) as pool:
+        futures = [pool.submit(play_match_game, i, seed + i, i % 2 == 0, ai_limit, engine_limit, ai_depth, ai_profile)
+                   for i in range(num_games)]
+        for future in concurrent.futures.as_completed(futures):
+            record = future.result()
+            results.write(json.dumps(record, allow_nan=False) + "\n")
+            results.flush()
+            if record['score'] == 1.0:
+                wins += 1
+            elif record['score'] == 0.5:
+                draws += 1
+            else:
+                losses += 1
+            ai_time += record['ai_avg_move_time']
+            engine_time += record['engine_avg_move_time']
+            elo, error = elo_difference(wins, draws, losses)
+            print(f"Game {record['game']} ({record['ai_color']}): {record['result']}  "
+                  f"+{wins} ={draws} -{losses}  Elo {elo:+.1f} +/- {error:.1f}")
+
+        games = wins + draws + losses
+        elo, error = elo_difference(wins, draws, losses)
+        summary = {
+            'summary': True,
+            'engine': engine_command,
+            'games': games,
+            'wins': wins,
+            'draws': draws,
+            'losses': losses,
+            'elo': elo,
+            'elo_error': error,
+            'ai_avg_move_time': ai_time / games if games else 0.0,
+            'engine_avg_move_time': engine_time / games if games else 0.0,
+        }
+        results.write(json.dumps(summary, allow_nan=False) + "\n")
+    return summary
+
+# Positions of an EPD file (one per line) or of every game in a PGN file (each position before a
+# mainline move), read lazily as dicts of the FEN and where it came from
+def iter_analysis_positions(path):
+    with open(path) as f:
+        if path.lower().endswith('.pgn'):
+            game_number = 0
+            while True:
+                game = chess.pgn.read_game(f)
+                if game is None:
+                    return
+                game_number += 1
+                board = game.board()
+                for ply, move in enumerate(game.mainline_moves()):
+                    yield {'game': game_number, 'ply': ply, 'fen': board.fen(), 'played': move.uci()}
+                    board.push(move)
+        else:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                try:
+                    board, operations = chess.Board.from_epd(line)
+                except ValueError as error:
+                    raise ValueError(f"{path}:{line_number}: {error}")
+                position = {'line': line_number, 'fen': board.fen()}
+                if 'id' in operations:
+                    position['id'] = operations['id']
+                if 'bm' in operations:
+                    position['bm'] = [move.uci() for move in operations['bm']]
+                yield position
+
+# Per-process searcher for run_analysis. It is deterministic, so a position's result does not
+# depend on which worker got it or what that worker searched before.
+analysis_worker_player = None
+
+def init_analysis_worker(tablebase=None):
+    global analysis_worker_player
+    analysis_worker_player = AIPlayer(chess.WHITE, deterministic=True, tablebase=tablebase)
+
+def analyse_position(index, position, limit):
+    board = chess.Board(position['fen'])
+    record = {'index': index, **position}
+    if board.is_game_over():
+        record.update(bestmove=None, score_cp=None, score_mate=None, game_over=board.outcome().termination.name.lower())
+        return record
+    player = analysis_worker_player
+    start = time.perf_counter()
+    move = player.get_best_move(board, limit)
+    stats = player.stats
+    kind, value = stats.uci_score() if stats.score is not None else (None, None)
+    record.update(bestmove=move.uci() if move else None, score_cp=value if kind == 'cp' else None,
+                  score_mate=value if kind == 'mate' else None, depth=stats.depth, seldepth=stats.seldepth,
+                  nodes=stats.nodes, time=round(time.perf_counter() - start, 4), pv=[move.uci() for move in stats.pv])
+    return record
+
+# Counts the complete records of an analysis output and cuts off a line left half-written by an
+# interrupted run; returns (records, last record)
+def analysis_checkpoint(path):
+    if not os.path.exists(path):
+        return 0, None
+    count = 0
+    last = None
+    end = 0
+    with open(path, 'rb+') as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            count += 1
+            last = record
+            end += len(line)
+        f.truncate(end)
+    return count, last
+
+# Analyses every position of an EPD or PGN file with AIPlayer in worker processes and writes one
+# JSON line per position to output_path, in input order. The input is read as the workers need
+# it, with at most a few positions per worker in flight or waiting for an earlier one. Positions
+# already in the output are skipped, so an interrupted run resumes where it stopped.
+def run_analysis(input_path, output_path="analysis.jsonl", workers=1, limit=None, tablebase=None, progress_interval=5.0):
+    resumed, last = analysis_checkpoint(output_path)
+    positions = iter_analysis_positions(input_path)
+    if resumed:
+        count = 0
+        for count, skipped in enumerate(itertools.islice(positions, resumed), 1):
+            pass
+        if count < resumed or skipped['fen'] != last['fen'] or last['index'] != resumed - 1:
+            raise ValueError(f"{output_path} does not continue an analysis of {input_path}")
+        print(f"Resuming after {resumed} positions already in {output_path}")
+
+    source = enumerate(positions, resumed)
+    pending = {}
+    finished = {}
+    next_index = resumed
+    nodes = 0
+    search_time = 0.0
+    start = last_report = time.monotonic()
+
+    def report():
+        analysed = next_index - resumed
+        elapsed = time.monotonic() - start
+        print(f"{next_index} positions ({analysed} this run)  {analysed / elapsed if elapsed else 0:.2f} positions/s  "
+              f"{nodes / search_time if search_time else 0:,.0f} nps")
+
+    with open(output_path, 'a') as output, concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=init_analysis_worker, initargs=(tablebase,)) as pool:
+        try:
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) + len(finished) < 4 * workers:
+                    item = next(source, None)
+                    if item is None:
+                        exhausted = True
+                    else:
+                        pending[pool.submit(analyse_position, item[0], item[1], limit)] = item[0]
+                if not pending and not finished:
+                    break
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    del pending[future]
+                    record = future.result()
+                    finished[record['index']] = record
+                # Results wait here until every earlier position is written
+                while next_index in finished:
+                    record = finished.pop(next_index)
+                    output.write(json.dumps(record) + "\n")
+                    nodes += record.get('nodes', 0)
+                    search_time += record.get('time', 0.0)
+                    next_index += 1
+                output.flush()
+                if time.monotonic() - last_report >= progress_interval:
+                    last_report = time.monotonic()
+                    report()
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            print(f"Interrupted; {next_index} positions are in {output_path}, run again to resume")
+    report()
+    return {'positions': next_index, 'analysed': next_index - resumed, 'resumed': resumed, 'nodes': nodes,
+            'time': time.monotonic() - start}
+
+# Board for a UCI "position startpos|fen <fen> [moves ...]" command
+def parse_uci_position(tokens):
+    if 'moves' in tokens:
+        moves = tokens[tokens.index('moves') + 1:]
+        tokens = tokens[:tokens.index('moves')]
+    else:
+        moves = []
+    if len(tokens) > 1 and tokens[1] == 'startpos':
+        board = chess.Board()
+    elif len(tokens) > 2 and tokens[1] == 'fen':
+        board = chess.Board(" ".join(tokens[2:]))
+    else:
+        raise ValueError("expected startpos or fen")
+    for move in moves:
+        board.push_uci(move)
+    return board
+
+# Minimal UCI engine that plays random legal moves, used as a stand-in opponent for run_match
+def random_uci_engine():
+    board = chess.Board()
+    for line in sys.stdin:
+        tokens = line.split()
+        if not tokens:
+            continue
+        if tokens[0] == 'uci':
+            print("id name Random Mover")
+            print("uciok")
+        elif tokens[0] == 'isready':
+            print("readyok")
+        elif tokens[0] == 'ucinewgame':
+            board = chess.Board()
+        elif tokens[0] == 'position':
+            board = parse_uci_position(tokens)
+        elif tokens[0] == 'go':
+            moves = list(board.legal_moves)
+            print(f"bestmove {random.choice(moves).uci() if moves else '0000'}")
+        elif tokens[0] == 'quit':
+            break
+        sys.stdout.flush()
+
+# Time kept back from every move for process and pipe latency, in seconds
+UCI_MOVE_OVERHEAD = 0.05
+
+# Moves left in the game assumed when the GUI sends a clock without movestogo
+UCI_DEFAULT_MOVES_TO_GO = 30
+
+# Seconds to think for this move under a "go" command, or None for no time limit
+def uci_time_budget(board, params):
+    if 'movetime' in params:
+        return max(0.01, params['movetime'] / 1000 - UCI_MOVE_OVERHEAD)
+    clock = params.get('wtime' if board.turn == chess.WHITE else 'btime')
+    if clock is None:
+        return None
+    increment = params.get('winc' if board.turn == chess.WHITE else 'binc', 0)
+    remaining = clock / 1000
+    # movestogo 0 makes no sense; plan for the last move before the time control instead
+    moves_to_go = max(1, params.get('movestogo', UCI_DEFAULT_MOVES_TO_GO))
+    budget = remaining / moves_to_go + increment / 1000 * 0.8
+    # Never plan to spend more than half of what is left on the clock
+    return max(0.01, min(budget, remaining / 2) - UCI_MOVE_OVERHEAD)
+
+# UCI front-end for AIPlayer. Searches run on a worker thread so "stop", "ponderhit" and
+# "isready" are answered while the engine is thinking.
+class UCIEngine:
+    def __init__(self, output=None, book_path=None, tablebase=None):
+        self.output = output or sys.stdout
+        self.output_lock = threading.Lock()
+        self.board = chess.Board()
+        self.hash_mb = 16
+        self.threads = 1
+        self.book_path = book_path
+        self.book = OpeningBook(book_path) if book_path else None
+        self.own_book = self.book is not None
+        self.tablebase = tablebase
+        # Kept apart from the tablebase so a SyzygyProbeLimit sent before SyzygyPath still applies
+        self.probe_limit = tablebase.requested_pieces if tablebase else None
+        self.player = None
+        self.thread = None
+        # Set once "stop" or "ponderhit" allows an infinite or ponder search to report its move
+        self.release = threading.Event()
+        self.ponder_budget = None
+
+    def send(self, line):
+        with self.output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def new_player(self):
+        if self.player is not None:
+            self.player.close()
+        self.player = AIPlayer(self.board.turn, hash_mb=self.hash_mb, workers=self.threads, info_callback=self.send,
+                               book=self.book if self.own_book else None, tablebase=self.tablebase)
+
+    def run(self, input=None):
+        # Forked search workers close sys.stdin on startup, which deadlocks while this thread is
+        # blocked reading it, so commands are read through a separate file object
+        input = input or open(sys.stdin.fileno(), closefd=False)
+        for line in input:
+            if not self.handle(line.split()):
+                break
+        self.stop_search()
+        if self.player is not None:
+            self.player.close()
+        if self.book is not None:
+            self.book.close()
+        if self.tablebase is not None:
+            self.tablebase.close()
+
+    # Handles one command; returns False on "quit"
+    def handle(self, tokens):
+        if not tokens:
+            return True
+        command = tokens[0]
+        if command == 'uci':
+            self.send("id name 12D Chess Engine")
+            self.send(f"option name Hash type spin default {self.hash_mb} min 1 max 4096")
+            self.send(f"option name Threads type spin default {self.threads} min 1 max 64")
+            self.send("option name Ponder type check default false")
+            self.send(f"option name OwnBook type check default {'true' if self.own_book else 'false'}")
+            self.send(f"option name BookFile type string default {self.book_path or '<empty>'}")
+            self.send(f"option name SyzygyPath type string default {self.tablebase.path if self.tablebase else '<empty>'}")
+            probe_limit = self.probe_limit if self.probe_limit is not None else 7
+            self.send(f"option name SyzygyProbeLimit type spin default {probe_limit} min 0 max 7")
+            self.send("uciok")
+        elif command == 'isready':
+            if self.player is None:
+                self.new_player()
+            self.send("readyok")
+        elif command == 'setoption':
+            self.set_option(tokens)
+        elif command == 'ucinewgame':
+            self.stop_search()
+            self.board = chess.Board()
+            self.new_player()
+        elif command == 'position':
+            self.stop_search()
+            try:
+                self.board = parse_uci_position(tokens)
+            except ValueError as e:
+                self.send(f"info string invalid position: {e}")
+        elif command == 'go':
+            self.go(tokens[1:])
+        elif command == 'stop':
+            self.stop_search()
+        elif command == 'ponderhit':
+            self.ponder_hit()
+        elif command == 'quit':
+            return False
+        return True
+
+    def set_option(self, tokens):
+        if 'name' not in tokens or 'value' not in tokens:
+            return
+        name = " ".join(tokens[tokens.index('name') + 1:tokens.index('value')]).lower()
+        value = " ".join(tokens[tokens.index('value') + 1:])
+        self.stop_search()
+        try:
+            if name == 'hash':
+                self.hash_mb = max(1, int(value))
+            elif name == 'threads':
+                self.threads = max(1, int(value))
+            elif name == 'ownbook':
+                self.own_book = value.lower() == 'true'
+            elif name == 'bookfile':
+                path = value if value and value != '<empty>' else None
+                book = OpeningBook(path) if path else None
+                if self.book is not None:
+                    self.book.close()
+                self.book_path, self.book = path, book
+                self.own_book = book is not None
+            elif name == 'syzygypath':
+                self.set_tablebase(value if value and value != '<empty>' else None, self.probe_limit)
+            elif name == 'syzygyprobelimit':
+                limit = int(value)
+                self.set_tablebase(self.tablebase.path if self.tablebase else None, limit)
+                self.probe_limit = limit
+            else:
+                return
+        except (ValueError, OSError) as e:
+            self.send(f"info string invalid value for {name}: {value} ({e})")
+            return
+        # Table size, worker count and book are fixed for the lifetime of a player
+        if self.player is not None:
+            self.new_player()
+
+    # Opens the tablebase before closing the old one, so a bad path leaves the old one in use
+    def set_tablebase(self, path, limit):
+        tablebase = Tablebase(path, limit) if path else None
+        if self.tablebase is not None:
+            self.tablebase.close()
+        self.tablebase = tablebase
+
+    def go(self, tokens):
+        params = {}
+        flags = set()
+        i = 0
+        while i < len(tokens):
+            if tokens[i] in ('wtime', 'btime', 'winc', 'binc', 'movestogo', 'movetime', 'depth', 'nodes') and i + 1 < len(tokens):
+                try:
+                    params[tokens[i]] = int(tokens[i + 1])
+                except ValueError:
+                    # A malformed go is ignored as a whole rather than searched with guessed limits
+                    self.send(f"info string invalid value for {tokens[i]}: {tokens[i + 1]}")
+                    return
+                i += 2
+            else:
+                flags.add(tokens[i])
+                i += 1
+
+        self.stop_search()
+
+        budget = uci_time_budget(self.board, params)
+        waits = 'infinite' in flags or 'ponder' in flags
+        # Only a ponder search may be put on the clock by a later ponderhit
+        self.ponder_budget = None
+        if 'ponder' in flags:
+            # The clock starts on ponderhit; until then search without a time limit
+            self.ponder_budget = budget
+            budget = None
+        limit = chess.engine.Limit(time=budget, depth=params.get('depth', MAX_SEARCH_DEPTH if waits else None),
+                                   nodes=params.get('nodes'))
+        if self.player is None:
+            self.new_player()
+        self.player.color = self.board.turn
+        self.release.clear()
+        self.thread = threading.Thread(target=self.search, args=(self.board.copy(), limit, waits), daemon=True)
+        self.thread.start()
+
+    def search(self, board, limit, waits):
+        try:
+            move = self.player.get_best_move(board, limit)
+        except Exception as e:
+            # The GUI waits for a bestmove whatever happens, so report the failure and pass
+            self.send(f"info string search failed: {e!r}")
+            move = None
+        # In infinite and ponder mode the move may only be reported after "stop" or "ponderhit"
+        if waits:
+            self.release.wait()
+        if move is None:
+            self.send("bestmove 0000")
+            return
+        pv = self.player.stats.pv
+        if len(pv) > 1 and pv[0] == move:
+            self.send(f"bestmove {move.uci()} ponder {pv[1].uci()}")
+        else:
+            self.send(f"bestmove {move.uci()}")
+
+    def stop_search(self):
+        if self.thread is None:
+            return
+        self.player.stop()
+        self.release.set()
+        self.thread.join()
+        self.thread = None
+        # The search may have finished before the stop arrived; it must not abort the next one
+        self.player.clear_stop()
+
+    def ponder_hit(self):
+        if self.thread is None:
+            return
+        # The predicted move was played: the running search continues on the real clock
+        if self.ponder_budget is not None:
+            self.player.set_time_limit(self.ponder_budget)
+        self.release.set()
+
+def ai_limit_from_args(args):
+    if args.ai_time is None and args.ai_depth is None and args.ai_nodes is None:
+        return None
+    return chess.engine.Limit(time=args.ai_time, depth=args.ai_depth, nodes=args.ai_nodes)
+
+def tablebase_from_args(args):
+    return Tablebase(args.syzygy, args.syzygy_pieces) if args.syzygy else None
+
 def main(args):
+    if args.random_uci:
+        random_uci_engine()
+        return
+    if args.make_book:
+        write_polyglot_book(args.make_book)
+        print(f"Wrote {len(OPENING_LINES)} opening lines to {args.make_book}")
+        return
+    if args.uci:
+        UCIEngine(book_path=args.book, tablebase=tablebase_from_args(args)).run()
+        return
+    if args.match:
+        engine_limit = chess.engine.Limit(depth=args.stockfish_depth) if args.stockfish_depth else chess.engine.Limit(time=args.thinking_time)
+        run_match(args.match, args.num_games, args.match_workers, args.results, ai_limit_from_args(args), engine_limit,
+                  ai_profile=args.ai_profile, book_path=args.book, tablebase=tablebase_from_args(args))
+        return
+    if args.analyse:
+        run_analysis(args.analyse, args.analyse_output, args.analyse_workers, ai_limit_from_args(args), tablebase_from_args(args))
+        return
+    if args.bench_search:
+        benchmark_search_features(depth=args.ai_depth or 5)
+        return
+    if args.bench_parallel:
+        benchmark_parallel_scaling(depth=args.ai_depth or 4)
+        return
+    if args.verify_batch12d:
+        sys.exit(0 if verify_board12d_batch(args.verify_batch12d) else 1)
+    if args.verify_eval:
+        sys.exit(0 if run_verify_evaluator() else 1)
+    if args.dataset12d:
+        sys.exit(0 if benchmark_board12d_dataset(args.dataset12d, args.dataset12d_positions) else 1)
+    if args.perft:
+        sys.exit(0 if run_perft(args.perft, args.perft_12d) else 1)
+    if args.bench_suite:
+        sys.exit(0 if run_benchmark_suite(args.bench_baseline, args.bench_threshold, args.bench_save) else 1)
+    if args.bench_board12d:
+        benchmark_board12d_movegen()
+        benchmark_board12d_checks()
+        benchmark_board12d_search()
+        return
+    if args.play12d:
+        play_board12d_game(limit=ai_limit_from_args(args) or chess.engine.Limit(time=1.0), max_plies=args.max_plies)
+        return
+    ai_limit = ai_limit_from_args(args)
+    book = OpeningBook(args.book) if args.book else None
+    tablebase = tablebase_from_args(args)
     if args.watch:
-        watch_12d_vs_stockfish(args.thinking_time, args.num_games, args.stockfish_depth)
+        watch_12d_vs_stockfish(args.thinking_time, args.num_games, args.stockfish_depth, ai_limit, args.ai_workers,
+                               args.engine_path, args.engine_threads, args.engine_hash, args.engine_pool, args.ponder,
+                               args.ai_info, args.ai_profile, book, tablebase)
     else:
-        play_game(thinking_time=args.thinking_time, watch=False)
+        play_game(thinking_time=args.thinking_time, watch=False, ai_limit=ai_limit, ai_workers=args.ai_workers,
+                  engine_path=args.engine_path, ai_info=args.ai_info, ai_profile=args.ai_profile, book=book,
+                  tablebase=tablebase)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="12D Chess Engine")
@@ -580,6 +3787,44 @@ if __name__ == "__main__":
     parser.add_argument('--thinking_time', type=float, default=1.0, help="Thinking time for Stockfish (in seconds)")
     parser.add_argument('--num_games', type=int, default=1, help="Number of games to play")
     parser.add_argument('--stockfish_depth', type=int, default=None, help="Depth for Stockfish engine")
+    parser.add_argument('--engine_path', type=str, default=None, help="UCI engine executable (default: $STOCKFISH_PATH or stockfish on PATH)")
+    parser.add_argument('--engine_threads', type=int, default=None, help="Threads option for the UCI engine")
+    parser.add_argument('--engine_hash', type=int, default=None, help="Hash option (MB) for the UCI engine")
+    parser.add_argument('--engine_pool', type=int, default=1, help="Warm engine processes; watched games run this many at a time")
+    parser.add_argument('--ponder', action='store_true', help="Let the 12D AI keep searching while the engine thinks")
+    parser.add_argument('--ai_time', type=float, default=None, help="Thinking time for the 12D AI (in seconds)")
+    parser.add_argument('--ai_depth', type=int, default=None, help="Maximum search depth for the 12D AI")
+    parser.add_argument('--ai_nodes', type=int, default=None, help="Node budget for the 12D AI")
+    parser.add_argument('--ai_workers', type=int, default=1, help="Worker processes for the 12D AI search")
+    parser.add_argument('--ai_info', action='store_true', help="Print UCI-style info lines for every 12D AI search iteration")
+    parser.add_argument('--ai_profile', type=str, default=None, help="Profile every 12D AI search with cProfile into this directory")
+    parser.add_argument('--book', type=str, default=None, help="Polyglot opening book (.bin) for the 12D AI")
+    parser.add_argument('--syzygy', type=str, default=None, help="Syzygy tablebase directories for the 12D AI (separated by os.pathsep)")
+    parser.add_argument('--syzygy_pieces', type=int, default=None, help="Only probe tablebases with at most this many pieces")
+    parser.add_argument('--make_book', type=str, default=None, help="Write the built-in opening lines as a Polyglot book")
+    parser.add_argument('--match', type=str, default=None, help="Play a match against this UCI engine command")
+    parser.add_argument('--match_workers', type=int, default=1, help="Games played concurrently in a match")
+    parser.add_argument('--results', type=str, default="match_results.jsonl", help="JSONL file that match results are appended to")
+    parser.add_argument('--analyse', type=str, default=None, help="Analyse every position of this EPD or PGN file")
+    parser.add_argument('--analyse_output', type=str, default="analysis.jsonl", help="JSONL file for --analyse results (resumed if it exists)")
+    parser.add_argument('--analyse_workers', type=int, default=os.cpu_count(), help="Worker processes for --analyse")
+    parser.add_argument('--uci', action='store_true', help="Run the 12D AI as a UCI engine on stdin/stdout")
+    parser.add_argument('--random_uci', action='store_true', help="Run a random-move UCI engine (stand-in match opponent)")
+    parser.add_argument('--play12d', action='store_true', help="Watch two 12D AIs play on the 12D board")
+    parser.add_argument('--max_plies', type=int, default=40, help="Maximum plies for --play12d")
+    parser.add_argument('--bench_board12d', action='store_true', help="Benchmark 12D move generation against the dict-based board")
+    parser.add_argument('--verify_batch12d', type=int, default=None, help="Cross-check the batched NumPy 12D functions on this many random positions")
+    parser.add_argument('--verify_eval', action='store_true', help="Check the incremental evaluators against a full recount")
+    parser.add_argument('--dataset12d', type=str, default=None, help="Append random 12D positions to this dataset file and read them back")
+    parser.add_argument('--dataset12d_positions', type=int, default=10000, help="Positions appended by --dataset12d")
+    parser.add_argument('--perft', type=int, default=None, help="Run perft to this depth on the standard test positions")
+    parser.add_argument('--perft_12d', type=int, default=2, help="Perft depth for the 12D starting layouts")
+    parser.add_argument('--bench_suite', action='store_true', help="Benchmark move generation, checks and search against a baseline")
+    parser.add_argument('--bench_baseline', type=str, default="bench_baseline.json", help="Baseline file for --bench_suite")
+    parser.add_argument('--bench_threshold', type=float, default=0.3, help="Allowed slowdown for --bench_suite (0.3 = 30%%)")
+    parser.add_argument('--bench_save', action='store_true', help="Overwrite the --bench_suite baseline with this run")
+    parser.add_argument('--bench_search', action='store_true', help="Compare node counts with each selective search feature on and off")
+    parser.add_argument('--bench_parallel', action='store_true', help="Benchmark search speedup at 1/2/4/8/16 workers")
     args = parser.parse_args()
 
     main(args)
@@ -0,0 +1,115 @@
+import importlib.util
+import io
+import json
+import pathlib
+import sys
+
+import chess
+import chess.engine
+import pytest
+
+ENGINE_PATH = pathlib.Path(__file__).resolve().parent.parent / "12ChessEngine.py"
+
+# The script's name is not a valid module name, so it is loaded from its path. It is registered
+# in sys.modules so search and match worker processes can unpickle its functions.
+def load_engine():
+    spec = importlib.util.spec_from_file_location("chess_engine_12d", ENGINE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+engine = load_engine()
+
+MATED_FEN = "7k/6Q1/6K1/8/8/8/8/8 b - - 0 1"
+STALEMATE_FEN = "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1"
+
+def run_uci(commands):
+    output = io.StringIO()
+    engine.UCIEngine(output=output).run(io.StringIO("".join(line + "\n" for line in commands)))
+    return output.getvalue().splitlines()
+
+def test_perft():
+    assert engine.run_perft(depth=3, depth_12d=1, divide=False)
+
+def test_standard_board12d_cannot_castle():
+    board = engine.standard_board12d()
+    assert not [move for move in board.legal_moves() if len(move) == 3]
+
+@pytest.mark.parametrize("piece_square_tables", [None, engine.PIECE_SQUARE_TABLES])
+def test_incremental_evaluator(piece_square_tables):
+    evaluator = engine.IncrementalEvaluator(piece_square_tables=piece_square_tables)
+    assert engine.verify_evaluator(evaluator, plies=20) == []
+
+def test_batched_board12d():
+    pytest.importorskip("numpy")
+    assert engine.verify_board12d_batch(20)
+
+def test_board12d_dataset_round_trip(tmp_path):
+    assert engine.benchmark_board12d_dataset(str(tmp_path / "positions.bin"), positions=200)
+
+@pytest.mark.parametrize("fen", [MATED_FEN, STALEMATE_FEN])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_search_from_terminal_position(fen, workers):
+    lines = []
+    player = engine.AIPlayer(chess.BLACK, workers=workers, info_callback=lines.append)
+    try:
+        assert player.get_best_move(chess.Board(fen), chess.engine.Limit(depth=3)) is None
+    finally:
+        player.close()
+    assert player.stats.uci_score() == (('mate', 0) if fen == MATED_FEN else ('cp', 0))
+
+def test_parallel_search_fills_principal_variation():
+    player = engine.AIPlayer(chess.WHITE, workers=2)
+    try:
+        move = player.get_best_move(chess.Board(), chess.engine.Limit(depth=3))
+    finally:
+        player.close()
+    assert player.stats.pv[0] == move
+    assert len(player.stats.pv) == 3
+    assert player.stats.seldepth >= 3
+
+def test_uci_smoke():
+    lines = run_uci(["uci", "isready", "position startpos moves e2e4", "go depth 2", "isready", "quit"])
+    assert "uciok" in lines
+    assert "readyok" in lines
+    bestmove = [line for line in lines if line.startswith("bestmove")]
+    assert len(bestmove) == 1
+    board = chess.Board()
+    board.push_uci("e2e4")
+    assert chess.Move.from_uci(bestmove[0].split()[1]) in board.legal_moves
+
+def test_uci_ignores_malformed_commands():
+    lines = run_uci(["position", "position startpos moves e2e5", "go depth x", "go movestogo 0 wtime 1000 btime 1000",
+                     "isready", "quit"])
+    assert sum(1 for line in lines if line.startswith("info string")) == 3
+    assert "readyok" in lines
+    assert len([line for line in lines if line.startswith("bestmove")]) == 1
+
+def test_uci_reports_no_move_when_mated():
+    lines = run_uci([f"position fen {MATED_FEN}", "go depth 3", "isready", "quit"])
+    assert "bestmove 0000" in lines
+
+@pytest.mark.parametrize("record", [(0, 0, 0), (1, 0, 0), (0, 0, 5), (3, 2, 1), (0, 4, 0)])
+def test_elo_difference_is_finite(record):
+    elo, error = engine.elo_difference(*record)
+    assert abs(elo) < float('inf')
+    assert error is None if sum(record) == 0 else abs(error) < float('inf')
+
+def test_match_against_random_uci(tmp_path):
+    results_path = tmp_path / "match.jsonl"
+    summary = engine.run_match(f"{sys.executable} {ENGINE_PATH} --random_uci", 2, results_path=str(results_path),
+                               ai_limit=chess.engine.Limit(depth=1), engine_limit=chess.engine.Limit(time=0.01),
+                               seed=1, ai_depth=1)
+    records = [json.loads(line) for line in results_path.read_text().splitlines()]
+    games, last = records[:-1], records[-1]
+    assert sorted(game['game'] for game in games) == [1, 2]
+    assert {game['ai_color'] for game in games} == {'White', 'Black'}
+    for game in games:
+        assert game['result'] in ('1-0', '0-1', '1/2-1/2')
+        assert game['score'] in (0.0, 0.5, 1.0)
+        assert game['pgn'] and game['plies'] > 0
+    assert last == summary
+    assert last['summary'] and last['games'] == 2
+    assert last['wins'] + last['draws'] + last['losses'] == 2
+    assert abs(last['elo']) < float('inf') and abs(last['elo_error']) < float('inf')